@@ -1,24 +1,115 @@
 """End-to-end pipeline for scraping a site and generating ad ideas with images."""
 
 import asyncio
+import hashlib
 import json
+import logging
 import os
 import re
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Annotated, Any, Dict, List, Optional, Tuple
 
+import diskcache
+from cachetools import TTLCache
+import openai
+import orjson
 from fastapi import HTTPException
-from pydantic import BaseModel, Field, HttpUrl
+from google.genai import errors as genai_errors
+from pydantic import BaseModel, Field, HttpUrl, StringConstraints, ValidationError
+from tenacity import (
+    AsyncRetrying,
+    before_sleep_log,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
+)
 
 import openai_chat
-from image_service import generate_image_base64_from_prompt
+from image_service import agenerate_image_base64_from_prompt
+from semantic_cache import SemanticCache
+
+logger = logging.getLogger(__name__)
 
 SCRAPER_SCRIPT = (
     Path(__file__).resolve().parent / "lightpanda-scraper" / "hybrid-scraper.js"
 )
 SCRAPER_TIMEOUT_SECONDS = int(os.getenv("SCRAPER_TIMEOUT_SECONDS", "75"))
+# The scraper prints this marker on its own line, followed by a single line of
+# JSON, so the result can be parsed as soon as it is written.
+SCRAPER_JSON_SENTINEL = b"---ADGENT-JSON---"
+SCRAPER_LINE_LIMIT = 16 * 1024 * 1024
+# How long a terminated scraper gets to close its browser before it is killed.
+SCRAPER_SHUTDOWN_GRACE_SECONDS = 5
+SCRAPE_CACHE_TTL_SECONDS = int(os.getenv("SCRAPE_CACHE_TTL_SECONDS", "3600"))
 AD_IDEA_COUNT = int(os.getenv("DEFAULT_AD_IDEA_COUNT", "3"))
 OPENAI_AD_MODEL = os.getenv("OPENAI_AD_MODEL")
+AD_PROMPT_CACHE_KEY = "adgent-ad-ideas"
+AD_CACHE_DIR = os.getenv("AD_CACHE_DIR", ".ad_cache")
+AD_CACHE_TTL_SECONDS = int(os.getenv("AD_CACHE_TTL_SECONDS", "86400"))
+AD_MAX_CONCURRENT = int(os.getenv("AD_MAX_CONCURRENT", "8"))
+AD_SEMANTIC_CACHE = os.getenv("AD_SEMANTIC_CACHE") == "1"
+AD_SEMANTIC_CACHE_THRESHOLD = float(os.getenv("AD_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+AD_SEMANTIC_CACHE_MODEL = os.getenv("AD_SEMANTIC_CACHE_MODEL", "text-embedding-3-small")
+
+_SYSTEM_PROMPT = (
+    "You are a senior creative strategist crafting marketing campaigns. "
+    "Create distinct ad concepts tailored to the company information provided. "
+    "Always respond with valid JSON matching the requested schema. "
+    "Do not include Markdown, code fences, or commentary outside of the JSON response."
+)
+# Invariant instructions are built once and lead the user prompt so OpenAI's
+# prefix-based prompt caching sees byte-identical text across sites; the
+# site-specific block is appended per request.
+_USER_PROMPT_PREFIX = (
+    f"Generate {AD_IDEA_COUNT} distinct, imaginative ad concepts. "
+    "Return JSON with exactly this structure:\n"
+    "{\n"
+    '  "ideas": [\n'
+    "    {\n"
+    '      "title": "≤12 word hook capturing the concept.",\n'
+    '      "description": "2-3 sentences describing the creative idea and how it ties to the company.",\n'
+    '      "image_prompt": "Detailed visual direction for an illustrative hero image."\n'
+    "    }\n"
+    "  ]\n"
+    "}\n"
+    "Make each idea unique, concrete, and rooted in the supplied context.\n\n"
+)
+
+_JSON_DECODER = json.JSONDecoder()
+_FENCE_HEAD_RE = re.compile(r"^```(?:json)?")
+_FENCE_TAIL_RE = re.compile(r"```$")
+
+# Environment handed to scraper subprocesses, captured once at import time.
+# Changes to os.environ after startup require a process restart to apply.
+_SCRAPER_ENV = {**os.environ}
+
+# Shared on-disk cache for OpenAI ad responses.
+_cache = diskcache.Cache(AD_CACHE_DIR)
+
+# Scrape tasks keyed by normalized URL. Storing the task rather than its result
+# lets concurrent requests for the same site share a single subprocess.
+_scrape_cache: "TTLCache[str, asyncio.Future]" = TTLCache(
+    maxsize=512, ttl=SCRAPE_CACHE_TTL_SECONDS
+)
+
+# In-flight ad generations keyed by request, so identical concurrent requests
+# await one pipeline run instead of each scraping and calling the APIs.
+_inflight: Dict[str, "asyncio.Future[List[Dict[str, str]]]"] = {}
+
+# Created on first use so it binds to the server's running event loop.
+_ADMISSION: Optional[asyncio.Semaphore] = None
+
+
+def _semantic_request_text(payload: "AdGenerationRequest") -> str:
+    url = re.sub(r"^https?://(www\.)?", "", str(payload.company_url).lower())
+    return f"{url.rstrip('/')}\n{payload.additional_context or ''}".strip()
+
+
+# Serves near-duplicate requests (``acme.com`` vs ``www.acme.com/``, or reworded
+# additional context) from a previous response.
+_semantic_cache = (
+    SemanticCache(AD_SEMANTIC_CACHE_THRESHOLD, maxsize=256) if AD_SEMANTIC_CACHE else None
+)
 
 
 class AdGenerationRequest(BaseModel):
@@ -33,55 +124,161 @@ class AdGenerationRequest(BaseModel):
     )
 
 
+# Stripping and the non-empty check run inside pydantic-core.
+_IdeaText = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+
+
+class AdIdea(BaseModel):
+    title: _IdeaText
+    description: _IdeaText
+    image_prompt: _IdeaText
+
+
+class AdResponse(BaseModel):
+    ideas: List[AdIdea] = Field(..., min_length=AD_IDEA_COUNT)
+
+
 def _truncate_text(text: Optional[str], limit: int = 2500) -> str:
     if not text:
         return ""
+    if len(text) <= limit:
+        return text.strip()
     trimmed = text.strip()
     if len(trimmed) <= limit:
         return trimmed
     truncated = trimmed[:limit]
-    last_space = truncated.rfind(" ")
-    if last_space > 200:
+    # Only cut back to a word boundary found past the first 200 characters.
+    last_space = truncated.rfind(" ", 201)
+    if last_space != -1:
         truncated = truncated[:last_space]
-    return truncated.strip() + " ..."
-
-
-def _extract_json_blob(raw_output: str) -> str:
-    candidates: list[str] = []
-    depth = 0
-    start_index: Optional[int] = None
-    for index, char in enumerate(raw_output):
-        if char == "{":
-            if depth == 0:
-                start_index = index
-            depth += 1
-        elif char == "}":
-            if depth:
-                depth -= 1
-                if depth == 0 and start_index is not None:
-                    candidates.append(raw_output[start_index : index + 1])
-                    start_index = None
-
-    for candidate in reversed(candidates):
-        snippet = candidate.strip()
+    return truncated.rstrip() + " ..."
+
+
+def _extract_json_payload(raw_output: bytes) -> Any:
+    """Return the last top-level JSON object embedded in ``raw_output``.
+
+    The payload is normally the final line of output, which is parsed straight
+    from bytes. Otherwise the output is decoded once and scanned by hopping
+    between ``{`` characters, letting the C decoder consume each candidate.
+    """
+    stripped = raw_output.strip()
+    for candidate in (stripped.rsplit(b"\n", 1)[-1], stripped):
+        if candidate.startswith(b"{"):
+            try:
+                return orjson.loads(candidate)
+            except orjson.JSONDecodeError:
+                pass
+
+    text = raw_output.decode("utf-8", errors="ignore")
+    payload: Any = None
+    found = False
+    position = 0
+    while True:
+        start = text.find("{", position)
+        if start == -1:
+            break
         try:
-            json.loads(snippet)
-            return snippet
+            payload, position = _JSON_DECODER.raw_decode(text, start)
+            found = True
         except json.JSONDecodeError:
-            continue
+            position = start + 1
+
+    if not found:
+        raise ValueError("Could not locate JSON payload in scraper output.")
+    return payload
+
+
+def _is_transient_error(exc: BaseException) -> bool:
+    """Return True for rate limits, timeouts, and 5xx errors worth retrying."""
+    if isinstance(exc, (openai.RateLimitError, openai.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code >= 500
+    if isinstance(exc, genai_errors.APIError):
+        code = exc.code or 0
+        return code == 429 or code >= 500
+    return False
+
+
+async def _call_with_retries(func, *args, **kwargs):
+    """Await ``func`` with bounded exponential backoff on transient errors."""
+    retrying = AsyncRetrying(
+        stop=stop_after_attempt(4),
+        wait=wait_exponential(multiplier=1, min=1, max=8),
+        retry=retry_if_exception(_is_transient_error),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True,
+    )
+    return await retrying(func, *args, **kwargs)
 
-    raise ValueError("Could not locate JSON payload in scraper output.")
+
+def _cache_key(namespace: str, data: Dict[str, Any]) -> str:
+    serialized = orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    return namespace + ":" + hashlib.sha256(serialized).hexdigest()
 
 
 def _strip_code_fence(text: str) -> str:
     cleaned = text.strip()
     if cleaned.startswith("```"):
-        cleaned = re.sub(r"^```(?:json)?", "", cleaned, count=1).strip()
-        cleaned = re.sub(r"```$", "", cleaned).strip()
+        cleaned = _FENCE_HEAD_RE.sub("", cleaned, count=1).strip()
+        cleaned = _FENCE_TAIL_RE.sub("", cleaned).strip()
     return cleaned
 
 
+def _normalize_url(url: str) -> str:
+    return url.strip().rstrip("/").lower()
+
+
+async def _scrape_prompt_context(url: str) -> Dict[str, Any]:
+    scraped = await _scrape_with_lightpanda(url)
+    # Only these fields feed the prompt; dropping the rest (HTML, links,
+    # screenshots) here keeps it out of the scrape cache as well.
+    return {
+        "sourceUrl": scraped.get("sourceUrl"),
+        "title": scraped.get("title"),
+        "textContent": scraped.get("textContent"),
+    }
+
+
 async def _run_lightpanda_scraper(url: str) -> Dict[str, Any]:
+    key = _normalize_url(url)
+    # No await between lookup and insert, so this is atomic on the event loop.
+    future = _scrape_cache.get(key)
+    if future is None:
+        future = asyncio.ensure_future(_scrape_prompt_context(url))
+        _scrape_cache[key] = future
+
+    try:
+        # Shield so one cancelled request does not abort the shared scrape.
+        return await asyncio.shield(future)
+    except Exception:
+        # Failed scrapes are not cached; the next request retries.
+        if _scrape_cache.get(key) is future:
+            del _scrape_cache[key]
+        raise
+
+
+async def _read_scraper_stdout(
+    stream: asyncio.StreamReader,
+) -> Tuple[Optional[bytes], List[bytes]]:
+    """Read scraper stdout until the JSON line following the sentinel arrives.
+
+    Returns ``(payload_line, preceding_lines)``; ``payload_line`` is ``None``
+    when the stream ends without a sentinel.
+    """
+    lines: List[bytes] = []
+    sentinel_seen = False
+    async for line in stream:
+        if sentinel_seen:
+            return line, lines
+        if line.strip() == SCRAPER_JSON_SENTINEL:
+            sentinel_seen = True
+            continue
+        lines.append(line)
+    return None, lines
+
+
+async def _scrape_with_lightpanda(url: str) -> Dict[str, Any]:
     if not SCRAPER_SCRIPT.exists():
         raise HTTPException(
             status_code=500,
@@ -95,25 +292,76 @@ async def _run_lightpanda_scraper(url: str) -> Dict[str, Any]:
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.PIPE,
         cwd=str(SCRAPER_SCRIPT.parent),
-        env=os.environ.copy(),
+        env=_SCRAPER_ENV,
+        limit=SCRAPER_LINE_LIMIT,
     )
+    stderr_task = asyncio.ensure_future(process.stderr.read())
 
-    try:
-        stdout, stderr = await asyncio.wait_for(
-            process.communicate(), timeout=SCRAPER_TIMEOUT_SECONDS
-        )
-    except asyncio.TimeoutError:
+    async def collect() -> Tuple[Optional[bytes], List[bytes]]:
+        payload_line, lines = await _read_scraper_stdout(process.stdout)
+        if payload_line is None:
+            await process.wait()
+        return payload_line, lines
+
+    async def stop() -> None:
+        stderr_task.cancel()
         try:
             process.kill()
         except ProcessLookupError:
             pass
+        await process.wait()
+
+    async def shut_down() -> None:
+        try:
+            process.terminate()
+        except ProcessLookupError:
+            pass
+        # Keep draining stdout while it exits so teardown output can't fill the
+        # pipe and stall it; stderr_task is still reading the other pipe.
+        drain = asyncio.ensure_future(process.stdout.read())
+        try:
+            await asyncio.wait_for(process.wait(), timeout=SCRAPER_SHUTDOWN_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            await stop()
+        finally:
+            drain.cancel()
+            stderr_task.cancel()
+
+    try:
+        payload_line, stdout_lines = await asyncio.wait_for(
+            collect(), timeout=SCRAPER_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        await stop()
         raise HTTPException(
             status_code=504,
             detail="Lightpanda scraper timed out before completing.",
         )
+    except ValueError as exc:
+        # StreamReader raises ValueError (from LimitOverrunError) for a line over
+        # SCRAPER_LINE_LIMIT; the overrun bytes are dropped, so the output is lost.
+        await stop()
+        raise HTTPException(
+            status_code=502,
+            detail=(
+                "Lightpanda scraper printed a line longer than "
+                f"{SCRAPER_LINE_LIMIT} bytes. ({exc})"
+            ),
+        ) from exc
+
+    if payload_line is not None:
+        # The result is in hand; stop the scraper instead of waiting for it to
+        # finish on its own, but reap it before returning.
+        await shut_down()
+        try:
+            return orjson.loads(payload_line)
+        except orjson.JSONDecodeError as exc:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Scraper output could not be parsed as JSON. ({exc})",
+            ) from exc
 
-    stdout_text = stdout.decode("utf-8", errors="ignore")
-    stderr_text = stderr.decode("utf-8", errors="ignore").strip()
+    stderr_text = (await stderr_task).decode("utf-8", errors="ignore").strip()
 
     if process.returncode != 0:
         raise HTTPException(
@@ -124,10 +372,10 @@ async def _run_lightpanda_scraper(url: str) -> Dict[str, Any]:
             ),
         )
 
+    # Older scraper builds print JSON without a sentinel; search the output.
     try:
-        json_blob = _extract_json_blob(stdout_text)
-        return json.loads(json_blob)
-    except (ValueError, json.JSONDecodeError) as exc:
+        return _extract_json_payload(b"".join(stdout_lines))
+    except ValueError as exc:
         message = "Scraper output could not be parsed as JSON."
         if stderr_text:
             message += f" Scraper stderr: {stderr_text}"
@@ -138,103 +386,148 @@ async def _generate_from_context(
     context: Dict[str, Any], payload: AdGenerationRequest
 ) -> Dict[str, Any]:
     text_excerpt = _truncate_text(context.get("textContent"))
-    system_prompt = (
-        "You are a senior creative strategist crafting marketing campaigns. "
-        "Create distinct ad concepts tailored to the company information provided. "
-        "Always respond with valid JSON matching the requested schema. "
-        "Do not include Markdown, code fences, or commentary outside of the JSON response."
-    )
-    user_prompt = (
+    user_prompt = _USER_PROMPT_PREFIX + (
         f"Company URL: {context.get('sourceUrl') or str(payload.company_url)}\n"
         f"Website Title: {context.get('title') or 'Unknown'}\n"
         f"Primary website excerpt:\n{text_excerpt}\n\n"
         f"Additional context from requester:\n"
-        f"{payload.additional_context or 'None provided.'}\n\n"
-        f"Generate {AD_IDEA_COUNT} distinct, imaginative ad concepts. "
-        "Return JSON with exactly this structure:\n"
-        "{\n"
-        '  "ideas": [\n'
-        "    {\n"
-        '      "title": "≤12 word hook capturing the concept.",\n'
-        '      "description": "2-3 sentences describing the creative idea and how it ties to the company.",\n'
-        '      "image_prompt": "Detailed visual direction for an illustrative hero image."\n'
-        "    }\n"
-        "  ]\n"
-        "}\n"
-        "Make each idea unique, concrete, and rooted in the supplied context."
+        f"{payload.additional_context or 'None provided.'}"
     )
 
-    loop = asyncio.get_running_loop()
+    cache_key = _cache_key(
+        "ideas",
+        {
+            "url": context.get("sourceUrl") or str(payload.company_url),
+            "title": context.get("title"),
+            "excerpt": text_excerpt,
+            "extra": payload.additional_context,
+            "model": OPENAI_AD_MODEL,
+            "count": AD_IDEA_COUNT,
+        },
+    )
+    raw_response = _cache.get(cache_key)
+    cache_hit = raw_response is not None
 
-    try:
-        raw_response = await loop.run_in_executor(
-            None,
-            lambda: openai_chat.responses(
+    if not cache_hit:
+        try:
+            raw_response = await _call_with_retries(
+                openai_chat.aresponses,
                 user_prompt,
-                system=system_prompt,
+                system=_SYSTEM_PROMPT,
                 model=OPENAI_AD_MODEL,
-            ),
-        )
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(
-            status_code=502, detail=f"OpenAI ad generation failed: {exc}"
-        ) from exc
+                prompt_cache_key=AD_PROMPT_CACHE_KEY,
+            )
+        except Exception as exc:  # noqa: BLE001
+            raise HTTPException(
+                status_code=502, detail=f"OpenAI ad generation failed: {exc}"
+            ) from exc
 
     cleaned = _strip_code_fence(raw_response)
     try:
-        return json.loads(cleaned)
-    except json.JSONDecodeError as exc:
+        ad_response = orjson.loads(cleaned)
+    except orjson.JSONDecodeError as exc:
         raise HTTPException(
             status_code=502,
             detail="OpenAI returned a response that was not valid JSON.",
         ) from exc
 
+    # Only cache responses that parsed, so a malformed reply is retried next time.
+    if not cache_hit:
+        _cache.set(cache_key, raw_response, expire=AD_CACHE_TTL_SECONDS)
+    return ad_response
+
 
 async def generate_ad_ideas(payload: AdGenerationRequest) -> List[Dict[str, str]]:
-    scraped_context = await _run_lightpanda_scraper(str(payload.company_url))
-    ad_response = await _generate_from_context(scraped_context, payload)
+    key = hashlib.sha256(
+        (str(payload.company_url) + "|" + (payload.additional_context or "")).encode("utf-8")
+    ).hexdigest()
 
-    ad_ideas = ad_response.get("ideas")
-    if not isinstance(ad_ideas, list) or not ad_ideas:
-        raise HTTPException(
-            status_code=502,
-            detail="OpenAI response did not include any ad ideas.",
-        )
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_generate_ad_ideas(payload))
+        _inflight[key] = task
 
-    if len(ad_ideas) < AD_IDEA_COUNT:
-        raise HTTPException(
-            status_code=502,
-            detail=f"Expected at least {AD_IDEA_COUNT} ad ideas from OpenAI.",
-        )
+        def _forget(done: asyncio.Future) -> None:
+            if _inflight.get(key) is done:
+                del _inflight[key]
 
-    loop = asyncio.get_running_loop()
-    results: List[Dict[str, str]] = []
+        task.add_done_callback(_forget)
 
-    for idea in ad_ideas[:AD_IDEA_COUNT]:
-        title = str(idea.get("title", "")).strip()
-        description = str(idea.get("description", "")).strip()
-        image_prompt = str(idea.get("image_prompt", "")).strip()
+    results = await asyncio.shield(task)
+    # Each caller gets its own copies so one response cannot mutate another's.
+    return [dict(idea) for idea in results]
 
-        if not (title and description and image_prompt):
-            raise HTTPException(
-                status_code=502,
-                detail="OpenAI returned an idea missing required fields.",
-            )
 
+async def _generate_ad_ideas(payload: AdGenerationRequest) -> List[Dict[str, str]]:
+    global _ADMISSION
+    if _ADMISSION is None:
+        _ADMISSION = asyncio.Semaphore(AD_MAX_CONCURRENT)
+
+    # Bound concurrent pipeline runs so a burst queues here instead of fanning
+    # out into dozens of scrapers and hundreds of upstream API calls.
+    async with _ADMISSION:
+        return await _run_ad_pipeline(payload)
+
+
+async def _run_ad_pipeline(payload: AdGenerationRequest) -> List[Dict[str, str]]:
+    ad_response: Optional[Dict[str, Any]] = None
+    request_vector: Optional[List[float]] = None
+    if _semantic_cache is not None:
         try:
-            image_base64 = await loop.run_in_executor(
-                None, generate_image_base64_from_prompt, image_prompt
-            )
+            request_text = _semantic_request_text(payload)
+            request_vector = await openai_chat.aembed(request_text, model=AD_SEMANTIC_CACHE_MODEL)
+            ad_response = _semantic_cache.get_similar(request_vector)
         except Exception as exc:  # noqa: BLE001
+            # The semantic cache is an optimisation; never fail a request on it.
+            logger.warning("Semantic cache lookup failed: %s", exc)
+
+    generated = ad_response is None
+    if generated:
+        context = await _run_lightpanda_scraper(str(payload.company_url))
+        ad_response = await _generate_from_context(context, payload)
+
+    try:
+        parsed = AdResponse.model_validate(ad_response)
+    except ValidationError as exc:
+        first_error = exc.errors()[0]
+        location = ".".join(str(part) for part in first_error["loc"])
+        raise HTTPException(
+            status_code=502,
+            detail=(
+                f"OpenAI returned invalid ad ideas (expected at least {AD_IDEA_COUNT} "
+                f"with title, description, and image_prompt): {location}: {first_error['msg']}"
+            ),
+        ) from exc
+    validated = parsed.ideas[:AD_IDEA_COUNT]
+
+    # Remember only responses that passed validation.
+    if generated and _semantic_cache is not None and request_vector is not None:
+        _semantic_cache.put(request_text, ad_response, vector=request_vector)
+
+    # Ideas are independent, so dispatch every image request at once and wait
+    # for the slowest one instead of paying for each call in turn. Identical
+    # prompts within one response are only generated once.
+    unique_prompts = list(dict.fromkeys(idea.image_prompt for idea in validated))
+    images = await asyncio.gather(
+        # image_service caches generated images on disk, so repeats are cheap.
+        *(_call_with_retries(agenerate_image_base64_from_prompt, prompt) for prompt in unique_prompts),
+        return_exceptions=True,
+    )
+    images_by_prompt = dict(zip(unique_prompts, images))
+
+    results: List[Dict[str, str]] = []
+    for idea in validated:
+        image_base64 = images_by_prompt[idea.image_prompt]
+        if isinstance(image_base64, BaseException):
             raise HTTPException(
                 status_code=500,
-                detail=f"Image generation failed for idea '{title}': {exc}",
-            ) from exc
+                detail=f"Image generation failed for idea '{idea.title}': {image_base64}",
+            ) from image_base64
 
         results.append(
             {
-                "title": title,
-                "description": description,
+                "title": idea.title,
+                "description": idea.description,
                 "image": image_base64,
             }
         )
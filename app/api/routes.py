@@ -1,42 +1,71 @@
 """Router definitions for the ad-generation FastAPI service."""
 
+import asyncio
 import base64
-import glob
+import functools
+import hashlib
 import json
+import logging
 import mimetypes
 import os
 import re
-import time
+import shutil
+import sqlite3
 from io import BytesIO
 from pathlib import Path
-from typing import Dict, List, Optional, Union
-
-from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import aiofiles
+import cachetools
+import httpx
+import orjson
+from aiolimiter import AsyncLimiter
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile
 from fastapi.responses import FileResponse, JSONResponse, Response
 from google import genai
+from google.genai import errors as genai_errors
 from google.genai import types as Gtypes
 from google.genai.types import GenerateVideosConfig, Image as GImage, VideoGenerationReferenceImage
-from openai import AsyncOpenAI
+from openai import APIConnectionError, AsyncOpenAI, RateLimitError
 from PIL import Image
 from pydantic import BaseModel, Field
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
 
 from ad_pipeline import AdGenerationRequest, generate_ad_ideas
+from app.core.http import genai_http_options
 from ffmpeg_stitched import process_scenes_and_join
 from image_service import API_KEY
+from semantic_cache import SemanticCache
 from tts_service import generate_all_voiceovers
 
 # Core configuration
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
+_BASE_DIR_PREFIX = str(BASE_DIR) + os.sep
 IMAGES_BASE = BASE_DIR / "images"
 GENERATED_SCENES_BASE = BASE_DIR / "generated_scenes"
 STORYBOARD_PATH = IMAGES_BASE / "generated_storyboard_12.json"
 nano_banana = "gemini-2.5-flash-image"
-client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+# Shared by every scene-image request instead of rebuilding it per call.
+_GEMINI_16x9_CFG = Gtypes.GenerateContentConfig(image_config=Gtypes.ImageConfig(aspect_ratio="16:9"))
 CHAR_ASSET_PATH = str(IMAGES_BASE)
 SCENE_ASSET_PATH = str(IMAGES_BASE)
 OUTPUT_PATH = str(GENERATED_SCENES_BASE)
+SCENE_CONCURRENCY = int(os.getenv("SCENE_CONCURRENCY", "8"))
+VIDEO_CONCURRENCY = int(os.getenv("VIDEO_CONCURRENCY", "4"))
+VEO_POLL_INITIAL_SECONDS = 10.0
+VEO_POLL_MAX_SECONDS = 60.0
+# 🎯 Limit total reference images to avoid IMAGE_OTHER error (2-3 works best)
+MAX_REFERENCE_IMAGES = 2
+# Finished renders, content-addressed by prompt + reference images (see scene_cache_path).
+SCENE_CACHE_DIR = BASE_DIR / ".cache" / "scenes"
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "60"))
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+_SLUG_SCHEME_RE = re.compile(r"^https?://")
+_SLUG_UNSAFE_RE = re.compile(r"[^a-z0-9._-]")
 
 
 def website_to_slug(website: Optional[str]) -> str:
@@ -45,10 +74,9 @@ def website_to_slug(website: Optional[str]) -> str:
     if not website:
         return "default"
 
-    cleaned = re.sub(r"^https?://", "", website.strip().lower())
-    cleaned = cleaned.replace("/", "-")
-    cleaned = re.sub(r"[^a-z0-9._-]", "-", cleaned)
-    cleaned = cleaned.strip("-._")
+    cleaned = _SLUG_SCHEME_RE.sub("", website.strip().lower())
+    # "/" falls outside the allowed class, so this also turns path separators into "-".
+    cleaned = _SLUG_UNSAFE_RE.sub("-", cleaned).strip("-._")
     return cleaned or "default"
 
 
@@ -61,11 +89,16 @@ def scene_image_path(slug: str, scene_index: int) -> Path:
 def public_url_for_path(file_path: Path) -> str:
     """Convert an absolute file path into an API-served public URL."""
 
+    # Paths built from BASE_DIR are already absolute, so a prefix strip avoids
+    # the realpath() walk; resolve() is only needed for anything else.
+    path_str = str(file_path)
+    if path_str.startswith(_BASE_DIR_PREFIX):
+        return "/" + path_str[len(_BASE_DIR_PREFIX):].replace(os.sep, "/")
     try:
         relative_path = file_path.resolve().relative_to(BASE_DIR)
         return "/" + relative_path.as_posix()
     except Exception:
-        return str(file_path)
+        return path_str
 
 
 def storyboard_path_for_slug(slug: str) -> Path:
@@ -74,6 +107,21 @@ def storyboard_path_for_slug(slug: str) -> Path:
     return IMAGES_BASE / slug / "generated_storyboard.json"
 
 
+async def read_storyboard(path: Path):
+    """Read and parse storyboard JSON without blocking the event loop."""
+
+    async with aiofiles.open(path, "rb") as f:
+        return orjson.loads(await f.read())
+
+
+async def write_storyboard(path: Path, data) -> None:
+    """Write storyboard JSON indented by two spaces, with non-ASCII text kept as UTF-8."""
+
+    await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+    async with aiofiles.open(path, "wb") as f:
+        await f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
 def safe_slug(slug: str) -> str:
     """Sanitize slug inputs to prevent directory traversal."""
 
@@ -89,6 +137,7 @@ async def serve_final_video():
 # Allowed image formats
 ALLOWED_FORMATS = {"image/jpeg", "image/png", "image/webp"}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
 # veo3.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
@@ -104,28 +153,56 @@ ASSET_NAME_RE = re.compile(r"^char_asset(\d+)\.(?:png|jpg|jpeg|webp)$", re.IGNOR
 async def _load_pil_image(upload_file: UploadFile) -> Image.Image:
     if upload_file.content_type not in ALLOWED_FORMATS:
         raise HTTPException(status_code=400, detail=f"Invalid file format. Allowed: {ALLOWED_FORMATS}")
-    data = await upload_file.read()
-    if len(data) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail=f"File size exceeds {MAX_FILE_SIZE / (1024 * 1024)}MB limit")
+    # Read in chunks so an oversized upload is rejected as soon as it crosses the limit.
+    buffer = BytesIO()
+    total = 0
+    while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+        total += len(chunk)
+        if total > MAX_FILE_SIZE:
+            raise HTTPException(status_code=400, detail=f"File size exceeds {MAX_FILE_SIZE / (1024 * 1024)}MB limit")
+        buffer.write(chunk)
+    buffer.seek(0)
     try:
-        return Image.open(BytesIO(data))
+        return Image.open(buffer)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to load image: {str(e)}")
-def _next_char_asset_index() -> int:
+
+
+_char_asset_max_index: Optional[int] = None
+
+
+def _scan_char_asset_max_index() -> int:
     IMAGES_DIR.mkdir(parents=True, exist_ok=True)
     max_idx = 0
-    for entry in IMAGES_DIR.iterdir():
-        if not entry.is_file():
+    with os.scandir(IMAGES_DIR) as entries:
+        for entry in entries:
+            match = ASSET_NAME_RE.match(entry.name)
+            if match and entry.is_file():
+                max_idx = max(max_idx, int(match.group(1)))
+    return max_idx
+
+
+def _reserve_char_asset_path() -> Path:
+    """
+    Claim the next free char_assetX.png by creating it empty.
+
+    The directory is scanned once per process; afterwards the cached maximum is
+    bumped in memory. The name is claimed with O_CREAT | O_EXCL, so two workers
+    (or a file dropped in by hand) can never end up with the same path.
+    """
+    global _char_asset_max_index
+    if _char_asset_max_index is None:
+        _char_asset_max_index = _scan_char_asset_max_index()
+    while True:
+        _char_asset_max_index += 1
+        file_path = IMAGES_DIR / f"char_asset{_char_asset_max_index}.png"
+        try:
+            fd = os.open(file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
             continue
-        match = ASSET_NAME_RE.match(entry.name)
-        if match:
-            try:
-                idx = int(match.group(1))
-                if idx > max_idx:
-                    max_idx = idx
-            except ValueError:
-                continue
-    return max_idx + 1
+        os.close(fd)
+        return file_path
+
 
 @router.post("/upload-char-asset")
 async def upload_char_asset(image: UploadFile = File(...)):
@@ -134,14 +211,18 @@ async def upload_char_asset(image: UploadFile = File(...)):
     Returns the saved filename and relative path.
     """
     pil_image = await _load_pil_image(image)
-    next_idx = _next_char_asset_index()
-    filename = f"char_asset{next_idx}.png"
-    file_path = IMAGES_DIR / filename
+    file_path = _reserve_char_asset_path()
+    filename = file_path.name
 
     try:
-        pil_image.save(str(file_path), format="PNG")
+        # Fast zlib level; encoding runs off the event loop.
+        await asyncio.to_thread(pil_image.save, str(file_path), format="PNG", compress_level=1, optimize=False)
     except Exception as e:
+        # Release the reserved name rather than leave an empty PNG behind.
+        file_path.unlink(missing_ok=True)
         raise HTTPException(status_code=500, detail=f"Failed to save image: {e}")
+    finally:
+        _invalidate_char_asset_caches()
 
     return {
         "success": True,
@@ -156,50 +237,265 @@ async def validate_and_load_image(file: UploadFile) -> Image.Image:
     return await _load_pil_image(file)
 
 
-openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# --- Provider clients ---
+# The app lifespan creates one client per provider per worker, stores them on
+# app.state and binds them here, so nothing event-loop-bound is built at import
+# time (which breaks under uvicorn --reload).
+client: Optional[genai.Client] = None
+openai_client: Optional[AsyncOpenAI] = None
+
+
+def create_genai_client() -> genai.Client:
+    return genai.Client(api_key=os.getenv("GOOGLE_API_KEY"), http_options=genai_http_options())
+
+
+def create_openai_client() -> AsyncOpenAI:
+    # Scene fan-out can put many OpenAI calls in flight at once; give the client a
+    # connection pool large enough not to queue them behind httpx's default of 100.
+    return AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=1000, max_keepalive_connections=500),
+            timeout=httpx.Timeout(120.0),
+        ),
+    )
+
+
+def bind_clients(genai_client: genai.Client, async_openai_client: AsyncOpenAI) -> None:
+    """Point this module's helpers at the clients owned by the running app."""
+    global client, openai_client
+    client, openai_client = genai_client, async_openai_client
+
+
+def get_genai_client(request: Request) -> genai.Client:
+    return request.app.state.genai
+
+
+def get_openai_client(request: Request) -> AsyncOpenAI:
+    return request.app.state.openai
+
+# Per-provider request budgets, shared by every call site in this module.
+gemini_limiter = AsyncLimiter(GEMINI_RPM, 60)
+openai_limiter = AsyncLimiter(OPENAI_RPM, 60)
+
+
+def _is_retryable_provider_error(exc: BaseException) -> bool:
+    """Return True for rate limits, dropped connections and Gemini 429/5xx responses."""
+    if isinstance(exc, (RateLimitError, APIConnectionError)):
+        return True
+    if isinstance(exc, genai_errors.APIError):
+        code = exc.code or 0
+        return code == 429 or code >= 500
+    return False
+
+
+async def _rate_limited(limiter: AsyncLimiter, func, *args, **kwargs):
+    async with limiter:
+        return await func(*args, **kwargs)
+
+
+async def call_with_backoff(limiter: AsyncLimiter, func, *args, **kwargs):
+    """Await ``func`` under ``limiter``, retrying transient provider errors up to three times."""
+    retrying = AsyncRetrying(
+        stop=stop_after_attempt(3),
+        wait=wait_random_exponential(min=1, max=20),
+        retry=retry_if_exception(_is_retryable_provider_error),
+        reraise=True,
+    )
+    return await retrying(_rate_limited, limiter, func, *args, **kwargs)
+
+
+async def gemini_generate_content(**kwargs):
+    return await call_with_backoff(gemini_limiter, client.aio.models.generate_content, **kwargs)
+
+
+# Character-analysis answers are cached by exact prompt and, for single-scene
+# questions, by embedding similarity, so re-runs skip the LLM round-trip.
+LLM_CACHE_EMBEDDING_MODEL = os.getenv("LLM_CACHE_EMBEDDING_MODEL", "text-embedding-3-small")
+LLM_SEMANTIC_CACHE_THRESHOLD = float(os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD", "0.95"))
+_llm_cache = SemanticCache(
+    LLM_SEMANTIC_CACHE_THRESHOLD,
+    path=os.getenv("LLM_CACHE_PATH", str(BASE_DIR / ".cache" / "llm_semantic.sqlite")),
+)
+
+
+async def cached_llm_call(
+    prompt: str,
+    *,
+    model: str,
+    json_mode: bool = False,
+    semantic_text: Optional[str] = None,
+) -> str:
+    """
+    Return the chat completion text for ``prompt``, reusing earlier answers.
+
+    Exact repeats of ``prompt`` are always served from the cache. With
+    ``semantic_text`` set, an earlier answer whose ``semantic_text`` embeds close
+    enough to this one is served too. Pass only the varying part (e.g. the scene
+    description), not the templated prompt: a long shared template pulls every
+    embedding together. Leave it unset when small wording changes must produce a
+    different answer.
+    """
+    key = hashlib.sha256(f"{model}\n{json_mode}\n{prompt}".encode("utf-8")).hexdigest()
+    cached = _llm_cache.get_exact(key)
+    if cached is not None:
+        return cached
+
+    vector = None
+    if semantic_text is not None:
+        try:
+            embedding = await call_with_backoff(
+                openai_limiter,
+                openai_client.embeddings.create,
+                model=LLM_CACHE_EMBEDDING_MODEL,
+                input=semantic_text,
+            )
+            vector = embedding.data[0].embedding
+            cached = _llm_cache.get_similar(vector)
+        except Exception as e:
+            logger.warning("Semantic cache lookup failed: %s", e)
+        if cached is not None:
+            return cached
+
+    extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+    response = await call_with_backoff(
+        openai_limiter,
+        openai_client.chat.completions.create,
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0,
+        **extra,
+    )
+    content = response.choices[0].message.content
+    try:
+        _llm_cache.put(key, content, vector=vector)
+    except sqlite3.Error as e:
+        # e.g. "database is locked" when another worker is writing; the answer is still good.
+        logger.warning("Could not persist LLM cache entry: %s", e)
+    return content
+
+
+# --- Reference image cache ---
+# References only give the model a visual hint, so they are sent as small 16:9
+# thumbnails. Each file is decoded, shrunk and PNG-encoded into a Gemini Part
+# once per version; every later scene reuses the encoded bytes.
+REFERENCE_IMAGE_SIZE = (512, 288)
+
+
+def _reference_thumbnail(img: Image.Image) -> Image.Image:
+    thumb = img.copy() if img.mode in ("RGB", "RGBA") else img.convert("RGB")
+    thumb.thumbnail(REFERENCE_IMAGE_SIZE, Image.LANCZOS)
+    return thumb
+
+
+@functools.lru_cache(maxsize=128)
+def _load_reference_part(path: str, mtime_ns: int) -> Gtypes.Part:
+    """Encode one reference file; ``mtime_ns`` only keys the cache so edits invalidate it."""
+    with Image.open(path) as img:
+        return pil_to_part(_reference_thumbnail(img))
+
+
+def _reference_part(path: Union[str, Path]) -> Gtypes.Part:
+    return _load_reference_part(str(path), os.stat(path).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=8)
+def _list_char_assets_cached(dir_mtime_ns: int) -> Tuple[str, ...]:
+    with os.scandir(CHAR_ASSET_PATH) as entries:
+        return tuple(
+            entry.path
+            for entry in entries
+            if entry.name.startswith("char_asset") and entry.name.endswith(".png") and entry.is_file()
+        )
+
+
+def _list_char_assets() -> Tuple[str, ...]:
+    """Return the char_asset*.png paths, scanning the directory only when it changes."""
+    return _list_char_assets_cached(os.stat(CHAR_ASSET_PATH).st_mtime_ns)
+
+
+def _invalidate_char_asset_caches() -> None:
+    # Two uploads can land within one mtime tick, so don't rely on the mtime key alone.
+    _list_char_assets_cached.cache_clear()
+
+
+def load_char_asset_parts() -> Tuple[Gtypes.Part, ...]:
+    """Return the main-character reference images as ready-to-send parts."""
+    return tuple(_reference_part(char_path) for char_path in _list_char_assets())
+
+
+def find_scene_part(path: Path) -> Optional[Gtypes.Part]:
+    """
+    Return the scene image at ``path`` as a reference part, or None if it has not been rendered.
+
+    One stat both checks existence and keys the encoded-part cache. A cache miss
+    decodes and re-encodes the image, so async callers run this via ``asyncio.to_thread``.
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _load_reference_part(str(path), mtime_ns)
 
 
 # --- Enhanced Character Tracking ---
+# Character analysis per storyboard, keyed by a hash of its content. A changed
+# storyboard hashes differently, so entries never go stale; the LRU bound just
+# keeps memory flat.
+_character_analysis_cache: "cachetools.LRUCache[str, Dict[int, Dict[str, any]]]" = cachetools.LRUCache(maxsize=32)
+
+
+def _storyboard_hash(scenes: List[dict]) -> str:
+    return hashlib.sha256(orjson.dumps(scenes, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
 async def analyze_character_usage(scenes: List[dict]) -> Dict[int, Dict[str, any]]:
     """
     Analyze all scenes to identify characters and which scenes they appear in.
     Returns a mapping of scene_index -> {should_include_char, reference_scenes}
+
+    Results are memoized per storyboard content; treat the returned mapping as read-only.
     """
+    storyboard_key = _storyboard_hash(scenes)
+    cached = _character_analysis_cache.get(storyboard_key)
+    if cached is not None:
+        return cached
 
-    # First pass: Identify all characters and their mentions across scenes
-    character_mentions = await identify_characters_across_scenes(scenes)
+    # A single batched prompt answers, for every scene, which characters are
+    # present, whether the main character appears, and which earlier scenes to
+    # reference for consistency.
+    scene_analysis = await identify_characters_across_scenes(scenes)
 
-    # Second pass: For each scene, determine if character should be included
-    # and which previous scenes to reference for consistency
     scene_character_info = {}
 
-    for i, scene in enumerate(scenes):
-        scene_description = scene.get("scene_description", "")
+    for i in range(len(scenes)):
+        analysis = scene_analysis.get(i, {})
 
-        # Check if main character should appear in this scene
-        include_main_char = await should_include_character(scene_description)
+        # Convert to 0-indexed and keep only earlier scenes
+        reference_scenes = [
+            num - 1 for num in analysis.get("reference_scenes") or []
+            if isinstance(num, int) and 0 < num <= i
+        ]
 
-        # Check for references to previously seen characters
-        reference_scenes = await find_character_reference_scenes(
-            current_scene_idx=i,
-            current_description=scene_description,
-            all_scenes=scenes,
-            character_mentions=character_mentions
-        )
+        if reference_scenes:
+            logger.debug("Scene %s references scenes: %s", i + 1, [idx + 1 for idx in reference_scenes])
 
         scene_character_info[i] = {
-            "include_main_character": include_main_char,
+            "include_main_character": bool(analysis.get("include_main_character", False)),
             "reference_scenes": reference_scenes,  # List of scene indices to use as reference
-            "characters_present": character_mentions.get(i, [])
+            "characters_present": analysis.get("characters") or []
         }
 
+    # An empty analysis means the LLM call failed; don't pin that fallback.
+    if scene_analysis:
+        _character_analysis_cache[storyboard_key] = scene_character_info
     return scene_character_info
 
 
-async def identify_characters_across_scenes(scenes: List[dict]) -> Dict[int, List[str]]:
+async def identify_characters_across_scenes(scenes: List[dict]) -> Dict[int, dict]:
     """
-    Identify all characters mentioned across all scenes.
-    Returns: {scene_index: [list of characters mentioned]}
+    Identify characters, main-character presence, and reference scenes for all scenes.
+    Returns: {scene_index: {"characters": [...], "include_main_character": bool, "reference_scenes": [...]}}
     """
 
     all_descriptions = "\n\n".join([
@@ -208,132 +504,60 @@ async def identify_characters_across_scenes(scenes: List[dict]) -> Dict[int, Lis
     ])
 
     prompt = f"""Analyze these scene descriptions and identify all characters mentioned.
-For each scene, list the characters that appear or are referenced.
+For each scene:
+1. List the characters that appear or are referenced.
+2. Decide whether the main character should appear visually in the scene.
+3. List which PREVIOUS scenes should be used as visual reference to maintain character consistency.
+
 Pay special attention to:
 - Direct mentions (e.g., "the speaker", "a woman", "the scientist")
 - Indirect references (e.g., "cut back to them", "she returns", "he continues")
 - Pronouns that refer to previously introduced characters
+- Explicit callbacks ("cut back to the speaker", "return to the scientist")
+- The same character continuing their action
 
-Respond in JSON format:
+Respond in JSON format, using 1-indexed scene numbers:
 {{
   "scenes": [
-    {{"scene_number": 1, "characters": ["the speaker", "audience members"]}},
-    {{"scene_number": 2, "characters": []}},
+    {{"scene_number": 1, "characters": ["the speaker", "audience members"], "include_main_character": true, "reference_scenes": []}},
+    {{"scene_number": 2, "characters": [], "include_main_character": false, "reference_scenes": []}},
+    {{"scene_number": 3, "characters": ["the speaker"], "include_main_character": true, "reference_scenes": [1]}},
     ...
-  ],
-  "character_tracking": {{
-    "the speaker": [1, 4, 7],  // scenes where this character appears
-    "the scientist": [2, 3, 5]
-  }}
+  ]
 }}
 
+"reference_scenes" may only contain scenes that come before the current scene; use an empty list if no character consistency is needed.
+
 Scenes:
 {all_descriptions}"""
 
     try:
-        response = await openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-            response_format={"type": "json_object"}
-        )
+        # Whole-storyboard answers depend on every scene, so only reuse exact repeats.
+        content = await cached_llm_call(prompt, model="gpt-4o", json_mode=True)
 
-        result = json.loads(response.choices[0].message.content)
+        result = orjson.loads(content)
 
-        # Convert to dict mapping scene_index -> list of characters
-        character_mentions = {}
+        # Convert to dict mapping scene_index -> per-scene analysis
+        scene_analysis = {}
         for scene_info in result.get("scenes", []):
             scene_idx = scene_info["scene_number"] - 1  # Convert to 0-indexed
-            character_mentions[scene_idx] = scene_info.get("characters", [])
+            scene_analysis[scene_idx] = scene_info
 
-        return character_mentions
+        return scene_analysis
 
     except Exception as e:
-        print(f"⚠️ Error analyzing character usage: {str(e)}")
+        logger.warning("Error analyzing character usage: %s", e)
         # Fallback: return empty dict
         return {}
 
 
-async def find_character_reference_scenes(
-        current_scene_idx: int,
-        current_description: str,
-        all_scenes: List[dict],
-        character_mentions: Dict[int, List[str]]
-) -> List[int]:
-    """
-    For a given scene, find which previous scenes should be used as reference
-    to maintain character consistency.
-    Returns: List of scene indices (0-based) that should be used as reference images.
-    """
-
-    if current_scene_idx == 0:
-        return []  # First scene has no previous references
-
-    # Build context of previous scenes
-    previous_context = "\n".join([
-        f"Scene {i + 1}: {all_scenes[i].get('scene_description', '')} | Characters: {character_mentions.get(i, [])}"
-        for i in range(current_scene_idx)
-    ])
-
-    current_characters = character_mentions.get(current_scene_idx, [])
-
-    prompt = f"""Given the current scene and previous scenes, identify which PREVIOUS scenes should be used as visual reference to maintain character consistency.
-
-Current Scene (Scene {current_scene_idx + 1}):
-Description: {current_description}
-Characters present: {current_characters}
-
-Previous Scenes:
-{previous_context}
-
-Analyze if the current scene references or shows characters that appeared in previous scenes.
-Look for:
-1. Explicit callbacks ("cut back to the speaker", "return to the scientist")
-2. Same character continuing their action
-3. Characters referenced by pronouns
-
-Respond in JSON format with the scene numbers (1-indexed) that should be used as reference:
-{{
-  "reference_scenes": [1, 4],  // List of scene numbers to reference, or empty list []
-  "reasoning": "Scene 4 shows 'the speaker' who first appeared in scene 1"
-}}
-
-If no character consistency is needed, return an empty list."""
-
-    try:
-        response = await openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-            response_format={"type": "json_object"}
-        )
-
-        result = json.loads(response.choices[0].message.content)
-        reference_scene_numbers = result.get("reference_scenes", [])
-
-        # Convert to 0-indexed and ensure they're valid
-        reference_indices = [
-            num - 1 for num in reference_scene_numbers
-            if isinstance(num, int) and 0 < num <= current_scene_idx
-        ]
-
-        if reference_indices:
-            print(f"📎 Scene {current_scene_idx + 1} references scenes: {[i + 1 for i in reference_indices]}")
-            print(f"   Reasoning: {result.get('reasoning', 'N/A')}")
-
-        return reference_indices
-
-    except Exception as e:
-        print(f"⚠️ Error finding reference scenes for scene {current_scene_idx + 1}: {str(e)}")
-        return []
-
-
 async def generate_scene_image(
     scene_index: int,
     scene_description: str,
     all_scenes: List[dict],
     scene_character_info: Dict[int, Dict[str, any]],
     slug: str = "default",
+    use_cache: bool = True,
 ):
     """
     Generate scene image with intelligent character consistency tracking.
@@ -343,8 +567,9 @@ async def generate_scene_image(
         scene_description: Description of the scene
         all_scenes: List of all scene objects
         scene_character_info: Character tracking info from analyze_character_usage()
+        use_cache: Reuse an earlier render of the same prompt and references
     """
-    print(f"\n🎨 [generate_scene_image] Generating image for scene {scene_index}")
+    logger.debug("Generating image for scene %s", scene_index)
     content_parts = []
 
     # Get character info for this scene (convert to 0-indexed for dict lookup)
@@ -352,58 +577,51 @@ async def generate_scene_image(
     include_main_char = current_scene_info.get("include_main_character", False)
     reference_scenes = current_scene_info.get("reference_scenes", [])
 
-    print(f"👤 [generate_scene_image] Main character inclusion: {include_main_char}")
-    print(f"📎 [generate_scene_image] Character reference scenes: {[i + 1 for i in reference_scenes]}")
+    logger.debug("Main character inclusion: %s", include_main_char)
+    logger.debug("Character reference scenes: %s", [i + 1 for i in reference_scenes])
 
     # Add main character assets if needed
     if include_main_char:
-        char_paths = glob.glob(os.path.join(CHAR_ASSET_PATH, "char_asset*.png"))
-        for char_path in char_paths:
-            with Image.open(char_path) as char_img:
-                content_parts.append(char_img.copy())
-        print(f"✅ [generate_scene_image] Added {len(char_paths)} main character reference images")
+        char_parts = await asyncio.to_thread(load_char_asset_parts)
+        content_parts.extend(char_parts)
+        logger.debug("Added %s main character reference images", len(char_parts))
 
     # Add character consistency reference scenes (if any were identified by AI)
+    reference_set = set(reference_scenes)
     for ref_scene_idx in reference_scenes:
         ref_scene_num = ref_scene_idx + 1  # Convert to 1-indexed
-        scene_path = scene_image_path(slug, ref_scene_num)
-        if scene_path.exists():
-            print(f"📁 [generate_scene_image] Adding character reference: scene{ref_scene_num}.png")
-            with Image.open(scene_path) as img:
-                content_parts.append(img.copy())
+        scene_part = await asyncio.to_thread(find_scene_part, scene_image_path(slug, ref_scene_num))
+        if scene_part is not None:
+            logger.debug("Adding character reference: scene%s.png", ref_scene_num)
+            content_parts.append(scene_part)
         else:
-            print(f"⚠️ [generate_scene_image] Character reference not found: scene{ref_scene_num}.png")
+            logger.warning("Character reference not found: scene%s.png", ref_scene_num)
 
-        # 🎯 Limit total reference images to avoid IMAGE_OTHER error
-        MAX_REFERENCE_IMAGES = 2  # Adjust this value (2-3 works best)
+    if reference_scenes:
         total_refs = len(content_parts)
 
         # Add last two previous scenes for general visual consistency
-        recent_scene_indices = [scene_index - 1, scene_index - 2]
-
-        for idx in recent_scene_indices:
+        for idx in (scene_index - 1, scene_index - 2):
             # Check if we've hit the limit
             if total_refs >= MAX_REFERENCE_IMAGES:
-                print(
-                    f"⚠️ [generate_scene_image] Max reference limit reached ({MAX_REFERENCE_IMAGES}), skipping scene {idx}")
+                logger.debug("Max reference limit reached (%s), skipping scene %s", MAX_REFERENCE_IMAGES, idx)
                 break
 
             # Skip if already added as character reference
-            if (idx - 1) in reference_scenes:
-                print(f"ℹ️ [generate_scene_image] Scene {idx} already added as character reference, skipping duplicate")
+            if (idx - 1) in reference_set:
+                logger.debug("Scene %s already added as character reference, skipping duplicate", idx)
                 continue
 
             if idx > 0:
-                scene_path = scene_image_path(slug, idx)
-                if scene_path.exists():
-                    print(f"📁 [generate_scene_image] Adding previous scene for style continuity: scene{idx}.png")
-                    with Image.open(scene_path) as img:
-                        content_parts.append(img.copy())
-                        total_refs += 1  # Increment counter
+                scene_part = await asyncio.to_thread(find_scene_part, scene_image_path(slug, idx))
+                if scene_part is not None:
+                    logger.debug("Adding previous scene for style continuity: scene%s.png", idx)
+                    content_parts.append(scene_part)
+                    total_refs += 1  # Increment counter
                 else:
-                    print(f"ℹ️ [generate_scene_image] No reference found for scene {idx}")
+                    logger.debug("No reference found for scene %s", idx)
 
-        print(f"📊 [generate_scene_image] Total reference images: {len(content_parts)}")
+        logger.debug("Total reference images: %s", len(content_parts))
 
     # Build enhanced prompt with character consistency instructions
     prompt_parts = [
@@ -428,34 +646,45 @@ async def generate_scene_image(
     prompt_intro = " ".join(prompt_parts)
 
     try:
-        print(f"📊 [generate_scene_image] Preparing {len(content_parts)} image references")
-        for i, img in enumerate(content_parts):
-            print(f"   • Ref[{i}] type={type(img)}, size={getattr(img, 'size', 'unknown')}")
+        logger.debug("Preparing %s image references", len(content_parts))
+        for i, part in enumerate(content_parts):
+            logger.debug("Ref[%s] %s bytes", i, len(part.inline_data.data))
 
         if content_parts:
-            parts = [pil_to_part(img) for img in content_parts]
+            parts = list(content_parts)
         else:
-            print("ℹ️ [generate_scene_image] No image references provided. Using text-only prompt.")
+            logger.debug("No image references provided. Using text-only prompt.")
             parts = []
 
-        print(f"🧠 [generate_scene_image] Sending request to Gemini model: {nano_banana}")
-
-        response = client.models.generate_content(
+        out_path = scene_image_path(slug, scene_index)
+        scene_path = IMAGES_BASE / slug / "images" / f"scene{scene_index}.png"
+        cache_path = scene_cache_path(prompt_intro, parts)
+        if use_cache and cache_path.exists():
+            logger.debug("Reusing cached render %s for scene %s", cache_path.name, scene_index)
+            await restore_cached_scene(cache_path, out_path, scene_path)
+            return {
+                "scene_index": scene_index,
+                "included_main_char": include_main_char,
+                "character_reference_scenes": [i + 1 for i in reference_scenes],
+                "output_path": str(out_path),
+                "scene_asset_path": str(scene_path),
+                "cache_hit": True,
+            }
+
+        logger.debug("Sending request to Gemini model: %s", nano_banana)
+
+        response = await gemini_generate_content(
             model=nano_banana,
             contents=[
                 *parts,
                 prompt_intro,
             ],
-            config=Gtypes.GenerateContentConfig(
-                image_config=Gtypes.ImageConfig(
-                    aspect_ratio="16:9"
-                )
-            )
+            config=_GEMINI_16x9_CFG
         )
-        print(f"📨 [generate_scene_image] Gemini response received successfully")
+        logger.debug("Gemini response received successfully")
 
         if not response.candidates or len(response.candidates) == 0:
-            print("❌ [generate_scene_image] No candidates returned from Gemini response")
+            logger.error("No candidates returned from Gemini response")
             raise HTTPException(
                 status_code=500,
                 detail=f"No candidates in response. Response: {response}"
@@ -466,187 +695,220 @@ async def generate_scene_image(
         # Check finish_reason for specific errors
         if candidate.finish_reason and candidate.finish_reason.name != 'STOP':
             finish_reason = candidate.finish_reason.name
-            print(f"⚠️ [generate_scene_image] Generation stopped with reason: {finish_reason}")
+            logger.warning("Generation stopped with reason: %s", finish_reason)
 
-            if finish_reason == 'IMAGE_OTHER':
-                # Try again without reference images
-                print(f"🔄 [generate_scene_image] Retrying without reference images...")
-                response = client.models.generate_content(
-                    model=nano_banana,
-                    contents=prompt_intro,
-                    config=Gtypes.GenerateContentConfig(
-                        image_config=Gtypes.ImageConfig(
-                            aspect_ratio="16:9"
-                        )
-                    )
-                )
-                if response.candidates and len(response.candidates) > 0:
-                    candidate = response.candidates[0]
-                else:
-                    raise HTTPException(
-                        status_code=500,
-                        detail=f"Image generation failed with reason: {finish_reason}"
-                    )
-            else:
+            if finish_reason != 'IMAGE_OTHER':
                 raise HTTPException(
                     status_code=500,
                     detail=f"Image generation stopped with reason: {finish_reason}"
                 )
-                # Check finish_reason for specific errors
-        if candidate.finish_reason and candidate.finish_reason.name != 'STOP':
-            finish_reason = candidate.finish_reason.name
-            print(f"⚠️ [generate_scene_image] Generation stopped with reason: {finish_reason}")
 
-            if finish_reason == 'IMAGE_OTHER':
-                # Progressive fallback strategy
-                print(f"🔄 [generate_scene_image] Attempting progressive fallback...")
-
-                # Strategy 1: Try with only the most recent scene (no character refs)
-                if scene_index > 1:
-                    print(f"   Strategy 1: Using only most recent scene (scene{scene_index - 1})")
-                    fallback_parts = []
-                    recent_scene_path = scene_image_path(slug, scene_index - 1)
-
-                    if recent_scene_path.exists():
-                        with Image.open(recent_scene_path) as img:
-                            fallback_parts.append(pil_to_part(img.copy()))
-
-                        try:
-                            response = client.models.generate_content(
-                                model=nano_banana,
-                                contents=[*fallback_parts, prompt_intro],
-                                config=Gtypes.GenerateContentConfig(
-                                    image_config=Gtypes.ImageConfig(aspect_ratio="16:9")
-                                )
-                            )
-
-                            if response.candidates and len(response.candidates) > 0:
-                                candidate = response.candidates[0]
-                                if candidate.finish_reason and candidate.finish_reason.name == 'STOP':
-                                    print("   ✅ Strategy 1 succeeded!")
-                                else:
-                                    print(f"   ❌ Strategy 1 failed: {candidate.finish_reason.name}")
-                        except Exception as e:
-                            print(f"   ❌ Strategy 1 exception: {str(e)}")
-
-                # Strategy 2: Try with only character reference (if available)
-                if candidate.finish_reason.name != 'STOP' and reference_scenes:
-                    print(f"   Strategy 2: Using only character reference scene")
-                    fallback_parts = []
-                    char_ref_idx = reference_scenes[0]
-                    char_ref_path = scene_image_path(slug, char_ref_idx + 1)
-
-                    if char_ref_path.exists():
-                        with Image.open(char_ref_path) as img:
-                            fallback_parts.append(pil_to_part(img.copy()))
-
-                        try:
-                            response = client.models.generate_content(
-                                model=nano_banana,
-                                contents=[*fallback_parts, prompt_intro],
-                                config=Gtypes.GenerateContentConfig(
-                                    image_config=Gtypes.ImageConfig(aspect_ratio="16:9")
-                                )
-                            )
-
-                            if response.candidates and len(response.candidates) > 0:
-                                candidate = response.candidates[0]
-                                if candidate.finish_reason and candidate.finish_reason.name == 'STOP':
-                                    print("   ✅ Strategy 2 succeeded!")
-                                else:
-                                    print(f"   ❌ Strategy 2 failed: {candidate.finish_reason.name}")
-                        except Exception as e:
-                            print(f"   ❌ Strategy 2 exception: {str(e)}")
-
-                # Strategy 3: Last resort - no reference images
-                if candidate.finish_reason.name != 'STOP':
-                    print(f"   Strategy 3: No reference images (last resort)")
-                    try:
-                        response = client.models.generate_content(
-                            model=nano_banana,
-                            contents=prompt_intro,
-                            config=Gtypes.GenerateContentConfig(
-                                image_config=Gtypes.ImageConfig(aspect_ratio="16:9")
-                            )
-                        )
-
-                        if response.candidates and len(response.candidates) > 0:
-                            candidate = response.candidates[0]
-                            if candidate.finish_reason and candidate.finish_reason.name == 'STOP':
-                                print("   ✅ Strategy 3 succeeded!")
-                            else:
-                                print(f"   ❌ Strategy 3 failed: {candidate.finish_reason.name}")
-                                raise HTTPException(
-                                    status_code=500,
-                                    detail=f"All fallback strategies failed. Last reason: {candidate.finish_reason.name}"
-                                )
-                    except Exception as e:
-                        print(f"   ❌ Strategy 3 exception: {str(e)}")
-                        raise HTTPException(
-                            status_code=500,
-                            detail=f"Image generation failed completely: {str(e)}"
-                        )
+            # Progressive fallback: each strategy sends fewer references than the last,
+            # ending with the text-only prompt. Stop at the first one that succeeds.
+            logger.debug("Attempting progressive fallback...")
+            fallbacks = []
+            if scene_index > 1:
+                fallbacks.append(("Strategy 1: most recent scene only", scene_image_path(slug, scene_index - 1)))
+            if reference_scenes:
+                fallbacks.append(("Strategy 2: character reference scene only", scene_image_path(slug, reference_scenes[0] + 1)))
+            fallbacks.append(("Strategy 3: no reference images", None))
+
+            for name, ref_path in fallbacks:
+                if ref_path is None:
+                    contents = [prompt_intro]
+                else:
+                    ref_part = await asyncio.to_thread(find_scene_part, ref_path)
+                    if ref_part is None:
+                        continue
+                    contents = [ref_part, prompt_intro]
+                logger.debug("Trying fallback %s", name)
+                try:
+                    response = await gemini_generate_content(
+                        model=nano_banana,
+                        contents=contents,
+                        config=_GEMINI_16x9_CFG
+                    )
+                except Exception as e:
+                    logger.warning("Fallback %s raised: %s", name, e)
+                    continue
+
+                if not response.candidates:
+                    logger.warning("Fallback %s returned no candidates", name)
+                    continue
+                candidate = response.candidates[0]
+                if not candidate.finish_reason or candidate.finish_reason.name == 'STOP':
+                    logger.info("Fallback %s succeeded", name)
+                    break
+                finish_reason = candidate.finish_reason.name
+                logger.warning("Fallback %s failed: %s", name, finish_reason)
             else:
-                # Non-IMAGE_OTHER errors
                 raise HTTPException(
                     status_code=500,
-                    detail=f"Image generation stopped with reason: {finish_reason}"
+                    detail=f"All fallback strategies failed. Last reason: {finish_reason}"
                 )
-        print(f"📄 [generate_scene_image] Extracting content from candidate...")
-
-        if not hasattr(candidate, 'content') or not candidate.content:
-            print("❌ [generate_scene_image] No content in candidate")
-            raise HTTPException(
-                status_code=500,
-                detail=f"No content in candidate. Candidate: {candidate}"
-            )
+        logger.debug("Extracting content from candidate...")
 
-        if not hasattr(candidate.content, 'parts') or not candidate.content.parts:
-            print("❌ [generate_scene_image] No parts in candidate content")
+        image_bytes = _extract_inline_image(candidate)
+        if image_bytes is None:
+            logger.error("No inline image data found in candidate")
             raise HTTPException(
                 status_code=500,
-                detail=f"No parts in content. Content: {candidate.content}"
+                detail=f"No image generated in response. Candidate: {candidate}"
             )
+        logger.debug("Found inline image data in response")
 
-        image_bytes = None
-        for part in candidate.content.parts:
-            if hasattr(part, "inline_data") and part.inline_data:
-                if hasattr(part.inline_data, "data") and part.inline_data.data:
-                    image_bytes = part.inline_data.data
-                    print(f"✅ [generate_scene_image] Found inline image data in response")
-                    break
-
-        if not image_bytes:
-            print("❌ [generate_scene_image] No inline image data found in response parts")
-            raise HTTPException(
-                status_code=500,
-                detail=f"No image generated in response. Parts: {candidate.content.parts}"
-            )
+        logger.debug("Saving generated scene to %s and %s", out_path, scene_path)
+        await save_scene_image(image_bytes, out_path, scene_path)
+        await remember_scene_render(cache_path, out_path)
 
-        out_path = scene_image_path(slug, scene_index)
-        scene_path = IMAGES_BASE / slug / "images" / f"scene{scene_index}.png"
-
-        print(f"💾 [generate_scene_image] Saving generated scene to {out_path} and {scene_path}")
-        for path in [out_path, scene_path]:
-            os.makedirs(os.path.dirname(path), exist_ok=True)
-            with open(path, "wb") as f:
-                f.write(image_bytes)
-
-        print(f"✅ [generate_scene_image] Scene {scene_index} image saved successfully")
+        logger.debug("Scene %s image saved successfully", scene_index)
 
         return {
             "scene_index": scene_index,
             "included_main_char": include_main_char,
             "character_reference_scenes": [i + 1 for i in reference_scenes],
             "output_path": str(out_path),
-            "scene_asset_path": str(scene_path)
+            "scene_asset_path": str(scene_path),
+            "cache_hit": False,
         }
 
     except Exception as e:
-        print(f"❌ [generate_scene_image] Gemini generation failed for scene {scene_index}: {str(e)}")
+        logger.error("Gemini generation failed for scene %s: %s", scene_index, e)
         raise HTTPException(status_code=500, detail=f"Gemini generation failed: {str(e)}")
 
 
+def _extract_inline_image(candidate) -> Optional[bytes]:
+    """Return the first inline image in a Gemini candidate, or None if it has none."""
+    try:
+        parts = candidate.content.parts
+    except AttributeError:
+        return None
+    for part in parts or ():
+        inline_data = part.inline_data
+        if inline_data is not None and inline_data.data:
+            return inline_data.data
+    return None
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        if os.path.samefile(src, dst):
+            # Already the same inode (an earlier link, or both paths resolve to one
+            # file); unlinking dst here would delete the only copy.
+            return
+        dst.unlink()
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Different filesystem or no hard-link support.
+        shutil.copyfile(src, dst)
+
+
+def _write_scene_files(image_bytes: bytes, out_path: Path, mirror_path: Path) -> None:
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    # Write a new file and swap it in: truncating in place would also rewrite any
+    # render-cache entry hard-linked to the previous image.
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    tmp_path.write_bytes(image_bytes)
+    os.replace(tmp_path, out_path)
+    _link_or_copy(out_path, mirror_path)
+
+
+async def save_scene_image(image_bytes: bytes, out_path: Path, mirror_path: Path) -> None:
+    """Write a generated scene once and expose the same bytes at ``mirror_path`` via a hard link."""
+    await asyncio.to_thread(_write_scene_files, image_bytes, out_path, mirror_path)
+
+
+def scene_cache_path(prompt: str, parts: List[Gtypes.Part]) -> Path:
+    """Content-address a scene render by model, prompt and reference image bytes."""
+    digest = hashlib.sha256(f"{nano_banana}\n{prompt}".encode("utf-8"))
+    for part_digest in sorted(hashlib.sha256(part.inline_data.data).digest() for part in parts):
+        digest.update(part_digest)
+    return SCENE_CACHE_DIR / f"{digest.hexdigest()}.png"
+
+
+async def restore_cached_scene(cache_path: Path, out_path: Path, mirror_path: Path) -> None:
+    await asyncio.to_thread(_link_or_copy, cache_path, out_path)
+    await asyncio.to_thread(_link_or_copy, cache_path, mirror_path)
+
+
+async def remember_scene_render(cache_path: Path, out_path: Path) -> None:
+    try:
+        await asyncio.to_thread(_link_or_copy, out_path, cache_path)
+    except OSError as e:
+        logger.warning("Could not cache scene render %s: %s", cache_path.name, e)
+
+
+def _scene_reference_dependencies(scene_index: int, scene_character_info: Dict[int, Dict[str, any]]) -> Set[int]:
+    """
+    Return the earlier scene numbers (1-indexed) whose images generate_scene_image
+    reads as references for ``scene_index``; those must be rendered first.
+    """
+    reference_scenes = scene_character_info.get(scene_index - 1, {}).get("reference_scenes", [])
+    dependencies = {idx + 1 for idx in reference_scenes}
+    if reference_scenes:
+        # The recent-scene continuity references are only added alongside
+        # character references.
+        dependencies.update({scene_index - 1, scene_index - 2})
+    return {idx for idx in dependencies if 0 < idx < scene_index}
+
+
+async def generate_scene_images_concurrently(
+    jobs: List[Tuple[int, str]],
+    all_scenes: List[dict],
+    scene_character_info: Dict[int, Dict[str, any]],
+    slug: str = "default",
+) -> List[Union[dict, BaseException]]:
+    """
+    Generate several scene images at once, at most SCENE_CONCURRENCY in flight.
+
+    ``jobs`` holds ``(scene_index, scene_description)`` pairs. A scene that uses
+    earlier scenes as references waits for those to finish so it never reads a
+    missing or stale image; independent scenes run in parallel. Results (or the
+    raised exception) are returned in job order.
+    """
+    semaphore = asyncio.Semaphore(SCENE_CONCURRENCY)
+    finished = {scene_index: asyncio.Event() for scene_index, _ in jobs}
+
+    async def run(scene_index: int, scene_description: str) -> dict:
+        try:
+            for dependency in _scene_reference_dependencies(scene_index, scene_character_info):
+                if dependency in finished:
+                    await finished[dependency].wait()
+            async with semaphore:
+                return await generate_scene_image(
+                    scene_index=scene_index,
+                    scene_description=scene_description,
+                    all_scenes=all_scenes,
+                    scene_character_info=scene_character_info,
+                    slug=slug,
+                )
+        finally:
+            finished[scene_index].set()
+
+    return await asyncio.gather(
+        *(run(scene_index, description) for scene_index, description in jobs),
+        return_exceptions=True,
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _load_storyboard(path: str, mtime_ns: int):
+    return orjson.loads(Path(path).read_bytes())
+
+
+def load_storyboard(path: Path):
+    """
+    Return the parsed storyboard JSON at ``path``, re-parsing only after the file changes.
+
+    The result is shared between calls, so treat it as read-only.
+    """
+    return _load_storyboard(str(path), path.stat().st_mtime_ns)
+
+
 # --- Updated endpoint to use character consistency ---
 @router.post("/generate-storyboard-images")
 async def generate_all_storyboard_images():
@@ -658,8 +920,7 @@ async def generate_all_storyboard_images():
         raise HTTPException(status_code=404, detail=f"Storyboard JSON not found: {json_path}")
 
     try:
-        with open(json_path, "r") as f:
-            scenes = json.load(f)
+        scenes = load_storyboard(json_path)
     except json.JSONDecodeError as e:
         raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
 
@@ -667,36 +928,30 @@ async def generate_all_storyboard_images():
         raise HTTPException(status_code=400, detail="JSON must contain an array of scenes")
 
     # 🎯 Analyze character usage across ALL scenes first
-    print(f"\n🔍 Analyzing character consistency across {len(scenes)} scenes...")
+    logger.debug("Analyzing character consistency across %s scenes...", len(scenes))
     scene_character_info = await analyze_character_usage(scenes)
-    print(f"✅ Character analysis complete\n")
+    logger.info("Character analysis complete")
 
-    results = []
-
-    # Generate images for each scene
-    for i, scene in enumerate(scenes, start=1):
-        try:
-            scene_description = scene.get("scene_description", "")
-
-            result = await generate_scene_image(
-                scene_index=i,
-                scene_description=scene_description,
-                all_scenes=scenes,
-                scene_character_info=scene_character_info
-            )
+    outcomes = await generate_scene_images_concurrently(
+        [(i, scene.get("scene_description", "")) for i, scene in enumerate(scenes, start=1)],
+        all_scenes=scenes,
+        scene_character_info=scene_character_info,
+    )
 
+    results = []
+    for i, outcome in enumerate(outcomes, start=1):
+        if isinstance(outcome, BaseException):
+            logger.error("Error generating scene %s: %s", i, outcome)
             results.append({
                 "scene": i,
-                "status": "success",
-                **result
+                "status": "error",
+                "message": str(outcome)
             })
-
-        except Exception as e:
-            print(f"❌ Error generating scene {i}: {str(e)}")
+        else:
             results.append({
                 "scene": i,
-                "status": "error",
-                "message": str(e)
+                "status": "success",
+                **outcome
             })
 
     # Summary
@@ -720,13 +975,9 @@ async def should_include_character(scene_description: str) -> bool:
     )
 
     try:
-        response = await openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-        )
+        content = await cached_llm_call(prompt, model="gpt-4o-mini", semantic_text=scene_description)
 
-        answer = response.choices[0].message.content.strip().lower()
+        answer = content.strip().lower()
         return answer.startswith("y")
 
     except Exception as e:
@@ -735,40 +986,41 @@ async def should_include_character(scene_description: str) -> bool:
 
 def pil_to_part(image: Image.Image) -> Gtypes.Part:
     if image is None:
-        print("⚠️ [pil_to_part] Received None instead of a valid image!")
+        logger.warning("pil_to_part received None instead of a valid image")
         raise ValueError("Cannot convert NoneType to Part")
 
     buf = BytesIO()
-    image.save(buf, format="PNG")
-    buf.seek(0)
-    return Gtypes.Part.from_bytes(data=buf.read(), mime_type="image/png")
+    # These parts only travel to Gemini, so trade a little size for a much cheaper encode.
+    image.save(buf, format="PNG", compress_level=1)
+    return Gtypes.Part.from_bytes(data=buf.getvalue(), mime_type="image/png")
 
 
-async def dup_generate_scene_image(scene_index: int, scene_description: str, slug: str = "default"):
-    print(f"\n🎨 [generate_scene_image] Generating image for scene {scene_index}")
+async def dup_generate_scene_image(
+    scene_index: int,
+    scene_description: str,
+    slug: str = "default",
+    use_cache: bool = True,
+):
+    logger.debug("Generating image for scene %s", scene_index)
     content_parts = []
 
     include_char = await should_include_character(scene_description)
-    print(f"👤 [generate_scene_image] Character inclusion: {include_char}")
+    logger.debug("Character inclusion: %s", include_char)
 
     if include_char:
-        char_paths = glob.glob(os.path.join(CHAR_ASSET_PATH, "char_asset*.png"))
-        for char_path in char_paths:
-            with Image.open(char_path) as char_img:
-                content_parts.append(char_img.copy())
+        content_parts.extend(await asyncio.to_thread(load_char_asset_parts))
 
     # ⭐ Add last two previous scenes as references
     recent_scene_indices = [scene_index - 1, scene_index - 2]
 
     for idx in recent_scene_indices:
         if idx > 0:
-            scene_path = scene_image_path(slug, idx)
-            if scene_path.exists():
-                print(f"📁 [generate_scene_image] Adding previous scene reference: scene{idx}.png")
-                with Image.open(scene_path) as img:
-                    content_parts.append(img.copy())
+            scene_part = await asyncio.to_thread(find_scene_part, scene_image_path(slug, idx))
+            if scene_part is not None:
+                logger.debug("Adding previous scene reference: scene%s.png", idx)
+                content_parts.append(scene_part)
             else:
-                print(f"ℹ️ [generate_scene_image] No reference found for scene {idx}")
+                logger.debug("No reference found for scene %s", idx)
 
     prompt_intro = (
         "Generate a cinematic 16:9 widescreen PNG image depicting the scene below with consistent lighting and style. "
@@ -777,34 +1029,44 @@ async def dup_generate_scene_image(scene_index: int, scene_description: str, slu
     )
 
     try:
-        print(f"📊 [generate_scene_image] Preparing {len(content_parts)} image references")
-        for i, img in enumerate(content_parts):
-            print(f"   • Ref[{i}] type={type(img)}, size={getattr(img, 'size', 'unknown')}")
+        logger.debug("Preparing %s image references", len(content_parts))
+        for i, part in enumerate(content_parts):
+            logger.debug("Ref[%s] %s bytes", i, len(part.inline_data.data))
 
         if content_parts:
-            parts = [pil_to_part(img) for img in content_parts]
+            parts = list(content_parts)
         else:
-            print("ℹ️ [generate_scene_image] No image references provided. Using text-only prompt.")
+            logger.debug("No image references provided. Using text-only prompt.")
             parts = []
 
-        print(f"🧠 [generate_scene_image] Sending request to Gemini model: {nano_banana}")
-
-        response = client.models.generate_content(
+        out_path = scene_image_path(slug, scene_index)
+        scene_path = IMAGES_BASE / slug / "images" / f"scene{scene_index}.png"
+        cache_path = scene_cache_path(prompt_intro, parts)
+        if use_cache and cache_path.exists():
+            logger.debug("Reusing cached render %s for scene %s", cache_path.name, scene_index)
+            await restore_cached_scene(cache_path, out_path, scene_path)
+            return {
+                "scene_index": scene_index,
+                "included_char": include_char,
+                "output_path": str(out_path),
+                "scene_asset_path": str(scene_path),
+                "cache_hit": True,
+            }
+
+        logger.debug("Sending request to Gemini model: %s", nano_banana)
+
+        response = await gemini_generate_content(
             model=nano_banana,
             contents=[
                 *parts,
                 prompt_intro,
             ],
-            config=Gtypes.GenerateContentConfig(
-                image_config=Gtypes.ImageConfig(
-                    aspect_ratio="16:9"
-                )
-            )
+            config=_GEMINI_16x9_CFG
         )
-        print(f"📨 [generate_scene_image] Gemini response received successfully")
+        logger.debug("Gemini response received successfully")
 
         if not response.candidates or len(response.candidates) == 0:
-            print("❌ [generate_scene_image] No candidates returned from Gemini response")
+            logger.error("No candidates returned from Gemini response")
             raise HTTPException(
                 status_code=500,
                 detail=f"No candidates in response. Response: {response}"
@@ -815,19 +1077,15 @@ async def dup_generate_scene_image(scene_index: int, scene_description: str, slu
         # Check finish_reason for specific errors
         if candidate.finish_reason and candidate.finish_reason.name != 'STOP':
             finish_reason = candidate.finish_reason.name
-            print(f"⚠️ [generate_scene_image] Generation stopped with reason: {finish_reason}")
+            logger.warning("Generation stopped with reason: %s", finish_reason)
 
             if finish_reason == 'IMAGE_OTHER':
                 # Try again without reference images
-                print(f"🔄 [generate_scene_image] Retrying without reference images...")
-                response = client.models.generate_content(
+                logger.debug("Retrying without reference images...")
+                response = await gemini_generate_content(
                     model=nano_banana,
                     contents=prompt_intro,
-                    config=Gtypes.GenerateContentConfig(
-                        image_config=Gtypes.ImageConfig(
-                            aspect_ratio="16:9"
-                        )
-                    )
+                    config=_GEMINI_16x9_CFG
                 )
                 if response.candidates and len(response.candidates) > 0:
                     candidate = response.candidates[0]
@@ -842,57 +1100,33 @@ async def dup_generate_scene_image(scene_index: int, scene_description: str, slu
                     detail=f"Image generation stopped with reason: {finish_reason}"
                 )
 
-        print(f"📄 [generate_scene_image] Extracting content from candidate...")
-
-        if not hasattr(candidate, 'content') or not candidate.content:
-            print("❌ [generate_scene_image] No content in candidate")
-            raise HTTPException(
-                status_code=500,
-                detail=f"No content in candidate. Candidate: {candidate}"
-            )
-
-        if not hasattr(candidate.content, 'parts') or not candidate.content.parts:
-            print("❌ [generate_scene_image] No parts in candidate content")
-            raise HTTPException(
-                status_code=500,
-                detail=f"No parts in content. Content: {candidate.content}"
-            )
-
-        image_bytes = None
-        for part in candidate.content.parts:
-            if hasattr(part, "inline_data") and part.inline_data:
-                if hasattr(part.inline_data, "data") and part.inline_data.data:
-                    image_bytes = part.inline_data.data
-                    print(f"✅ [generate_scene_image] Found inline image data in response")
-                    break
+        logger.debug("Extracting content from candidate...")
 
-        if not image_bytes:
-            print("❌ [generate_scene_image] No inline image data found in response parts")
+        image_bytes = _extract_inline_image(candidate)
+        if image_bytes is None:
+            logger.error("No inline image data found in candidate")
             raise HTTPException(
                 status_code=500,
-                detail=f"No image generated in response. Parts: {candidate.content.parts}"
+                detail=f"No image generated in response. Candidate: {candidate}"
             )
+        logger.debug("Found inline image data in response")
 
-        out_path = scene_image_path(slug, scene_index)
-        scene_path = IMAGES_BASE / slug / "images" / f"scene{scene_index}.png"
-
-        print(f"💾 [generate_scene_image] Saving generated scene to {out_path} and {scene_path}")
-        for path in [out_path, scene_path]:
-            os.makedirs(os.path.dirname(path), exist_ok=True)
-            with open(path, "wb") as f:
-                f.write(image_bytes)
+        logger.debug("Saving generated scene to %s and %s", out_path, scene_path)
+        await save_scene_image(image_bytes, out_path, scene_path)
+        await remember_scene_render(cache_path, out_path)
 
-        print(f"✅ [generate_scene_image] Scene {scene_index} image saved successfully")
+        logger.info("Scene %s image saved successfully", scene_index)
 
         return {
             "scene_index": scene_index,
             "included_char": include_char,
             "output_path": str(out_path),
-            "scene_asset_path": str(scene_path)
+            "scene_asset_path": str(scene_path),
+            "cache_hit": False,
         }
 
     except Exception as e:
-        print(f"❌ [generate_scene_image] Gemini generation failed for scene {scene_index}: {str(e)}")
+        logger.error("Gemini generation failed for scene %s: %s", scene_index, e)
         raise HTTPException(status_code=500, detail=f"Gemini generation failed: {str(e)}")
 
 # --- Endpoint ---
@@ -913,67 +1147,66 @@ async def generate_scenes(
         ...
     ]
     """
-    print("🟢 [generate_scenes] Called /generate-scenes endpoint")
+    logger.info("Called /generate-scenes endpoint")
 
     try:
         slug = website_to_slug(website)
 
         if payload.storyboard:
             data = payload.storyboard
-            print(f"📝 [generate_scenes] Using storyboard provided in request body for slug '{slug}'")
+            logger.debug("Using storyboard provided in request body for slug '%s'", slug)
             target_storyboard_path = storyboard_path_for_slug(slug)
-            target_storyboard_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(target_storyboard_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            await write_storyboard(target_storyboard_path, data)
         else:
             candidate_paths = [storyboard_path_for_slug(slug), STORYBOARD_PATH]
             json_path = next((path for path in candidate_paths if path.exists()), None)
             if not json_path:
                 raise FileNotFoundError("Storyboard JSON not found for generation")
 
-            print(f"📂 [generate_scenes] Attempting to open storyboard JSON at: {json_path}")
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                print(f"✅ [generate_scenes] Successfully loaded JSON file with {len(data)} entries")
+            logger.debug("Attempting to open storyboard JSON at: %s", json_path)
+            data = await read_storyboard(json_path)
+            logger.info("Successfully loaded JSON file with %s entries", len(data))
 
         if not isinstance(data, list):
             raise ValueError("JSON root must be an array")
 
         # 🎯 Analyze character usage across ALL scenes first
-        print(f"\n🔍 Analyzing character consistency across {len(data)} scenes...")
+        logger.debug("Analyzing character consistency across %s scenes...", len(data))
         scene_character_info = await analyze_character_usage(data)
-        print(f"✅ Character analysis complete\n")
-
-        results = []
-        print("🔄 [generate_scenes] Starting scene generation loop")
+        logger.info("Character analysis complete")
 
+        jobs = []
         for i, entry in enumerate(data, start=1):
-            print(f"🎬 [generate_scenes] Processing scene index: {i}")
             scene_desc = entry.get("scene_description")
 
             if not scene_desc:
-                print(f"⚠️ [generate_scenes] Skipping scene {i}: Missing 'scene_description'")
+                logger.warning("Skipping scene %s: Missing 'scene_description'", i)
                 continue
 
-            print(f"📝 [generate_scenes] Scene {i} description: {scene_desc[:100]}...")
+            logger.debug("Scene %s description: %s...", i, scene_desc[:100])
+            jobs.append((i, scene_desc))
 
-            result = await generate_scene_image(
-                scene_index=i,
-                scene_description=scene_desc,
-                all_scenes=data,
-                scene_character_info=scene_character_info,
-                slug=slug,
-            )
+        logger.debug("Generating %s scenes, up to %s at a time", len(jobs), SCENE_CONCURRENCY)
+        outcomes = await generate_scene_images_concurrently(
+            jobs,
+            all_scenes=data,
+            scene_character_info=scene_character_info,
+            slug=slug,
+        )
 
-            print(f"✅ [generate_scenes] Scene {i} generation completed: {result}")
-            results.append(result)
+        # Any failed scene still fails the request, as it did when scenes ran one by one.
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        results = list(outcomes)
 
-        print(f"🏁 [generate_scenes] All scenes processed. Total generated: {len(results)}")
+        logger.info("All scenes processed. Total generated: %s", len(results))
 
-        return {"success": True, "scenes_generated": len(results), "details": results}
+        cache_hits = sum(1 for r in results if r.get("cache_hit"))
+        return {"success": True, "scenes_generated": len(results), "cache_hits": cache_hits, "details": results}
 
     except Exception as e:
-        print(f"❌ [generate_scenes] Exception occurred: {str(e)}")
+        logger.error("generate_scenes failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Storyboard processing failed: {str(e)}")
 
 
@@ -981,11 +1214,13 @@ async def generate_scenes(
 async def regenerate_scene(payload: dict, website: Optional[str] = Query(None)):
     """
     Regenerate a single scene image with a custom prompt.
-    Expected JSON body: { "scene_index": number, "prompt": string }
+    Expected JSON body: { "scene_index": number, "prompt": string, "force": bool (optional) }
+    Set "force" to skip the render cache and always ask Gemini for a new image.
     """
     try:
         scene_index = int(payload.get("scene_index"))
         prompt = str(payload.get("prompt") or "").strip()
+        use_cache = not bool(payload.get("force"))
         if scene_index <= 0:
             raise ValueError("scene_index must be >= 1")
         if not prompt:
@@ -999,8 +1234,7 @@ async def regenerate_scene(payload: dict, website: Optional[str] = Query(None)):
         json_path = storyboard_path_for_slug(slug)
         if not json_path.exists():
             json_path = STORYBOARD_PATH
-        with open(json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = await read_storyboard(json_path)
 
         # Analyze character usage
         scene_character_info = await analyze_character_usage(data)
@@ -1011,14 +1245,15 @@ async def regenerate_scene(payload: dict, website: Optional[str] = Query(None)):
             all_scenes=data,
             scene_character_info=scene_character_info,
             slug=slug,
+            use_cache=use_cache,
         )
 
         return {"success": True, "detail": result}
 
     except FileNotFoundError:
         # Fallback: Use dup_generate_scene_image if storyboard doesn't exist
-        print(f"⚠️ Storyboard not found, using fallback generation without character tracking")
-        result = await dup_generate_scene_image(scene_index, prompt, slug=slug)
+        logger.warning("Storyboard not found, using fallback generation without character tracking")
+        result = await dup_generate_scene_image(scene_index, prompt, slug=slug, use_cache=use_cache)
         return {"success": True, "detail": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Scene regeneration failed: {str(e)}")
@@ -1056,7 +1291,7 @@ async def health_check():
 async def generate_storyboard(
         selected_idea: str = Query(..., description="Story summary or idea to inject into the prompt"),
         website: Optional[str] = Query(None, description="Website URL used to scope assets"),
-
+        openai_client: AsyncOpenAI = Depends(get_openai_client),
 ):
     """
     Generate storyboard for scenes using OpenAI API.
@@ -1064,15 +1299,14 @@ async def generate_storyboard(
     - **prompt**: Text prompt for generation
     """
     try:
-        from openai import OpenAI
-        with open("generate_story_board_prompt.txt", encoding="utf-8") as f:
-            prompt = f.read()
+        async with aiofiles.open("generate_story_board_prompt.txt", encoding="utf-8") as f:
+            prompt = await f.read()
 
         prompt = prompt.replace("{insert story summary here}", selected_idea)
 
-        openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-        response = openai_client.chat.completions.create(
+        response = await call_with_backoff(
+            openai_limiter,
+            openai_client.chat.completions.create,
             model="gpt-4o",
             messages=[
                 {"role": "user", "content": prompt}
@@ -1082,7 +1316,7 @@ async def generate_storyboard(
         generated_text = response.choices[0].message.content
         # Parse output as JSON
         try:
-            storyboard_data = json.loads(generated_text)
+            storyboard_data = orjson.loads(generated_text)
         except json.JSONDecodeError as e:
             raise HTTPException(
                 status_code=500,
@@ -1092,15 +1326,11 @@ async def generate_storyboard(
         # Save parsed JSON (pretty-printed)
         slug = website_to_slug(website)
         slugged_path = storyboard_path_for_slug(slug)
-        slugged_path.parent.mkdir(parents=True, exist_ok=True)
 
-        with open(slugged_path, "w", encoding="utf-8") as f:
-            json.dump(storyboard_data, f, indent=2, ensure_ascii=False)
+        await write_storyboard(slugged_path, storyboard_data)
 
         # Maintain legacy default path for backward compatibility
-        STORYBOARD_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(STORYBOARD_PATH, "w", encoding="utf-8") as f:
-            json.dump(storyboard_data, f, indent=2, ensure_ascii=False)
+        await write_storyboard(STORYBOARD_PATH, storyboard_data)
 
         return {
             "success": True,
@@ -1128,9 +1358,19 @@ def existing_scene_videos(slug: str) -> List[dict]:
     if not video_root.exists():
         return videos
 
-    for video_file in sorted(video_root.glob("scene*.mp4")):
-        scene_match = re.match(r"scene(\d+)", video_file.stem)
-        scene_num = int(scene_match.group(1)) if scene_match else None
+    with os.scandir(video_root) as entries:
+        names = sorted(
+            entry.name
+            for entry in entries
+            if entry.name.startswith("scene") and entry.name.endswith(".mp4") and entry.is_file()
+        )
+
+    for video_file in (video_root / name for name in names):
+        # Names are already filtered to scene*.mp4, so the number is the rest of the stem.
+        try:
+            scene_num = int(video_file.stem[len("scene"):])
+        except ValueError:
+            scene_num = None
 
         videos.append({
             "scene": scene_num,
@@ -1150,9 +1390,105 @@ class GenerateRequest(BaseModel):
     json_file: str = str(STORYBOARD_PATH)
 
 
+async def _generate_scene_video(
+    genai_client: genai.Client,
+    render_slots: asyncio.Semaphore,
+    slug: str,
+    i: int,
+    total: int,
+    scene: dict,
+) -> dict:
+    """
+    Render one storyboard scene with Veo from its scene image and save the MP4.
+
+    ``render_slots`` is held only while Veo is rendering, so the download of a
+    finished scene overlaps with the next scene's render instead of holding its slot.
+    """
+    try:
+        logger.debug("Processing Scene %s/%s", i, total)
+
+        if "scene_description" not in scene:
+            return {"scene": i, "status": "error", "message": "Missing scene_description"}
+
+        image_path = scene_image_path(slug, i)
+        if not image_path.exists():
+            return {"scene": i, "status": "error", "message": f"Missing image: {image_path}"}
+
+        logger.debug("Loading reference image: %s", image_path)
+
+        # --- Load image as bytes ---
+        # GImage.image_bytes is a pydantic bytes field and the SDK base64-encodes it
+        # for the request, so an mmap/memoryview would just be copied back into
+        # bytes; one read of the file is already the minimum.
+        async with aiofiles.open(image_path, "rb") as img_file:
+            image_bytes = await img_file.read()
+
+        mime_type, _ = mimetypes.guess_type(str(image_path))
+        if not mime_type:
+            mime_type = "image/png"
+
+        # ✅ Correctly create reference image
+        reference_image = VideoGenerationReferenceImage(
+            image=GImage(
+                image_bytes=image_bytes,
+                mime_type=mime_type
+            ),
+            reference_type="asset"
+        )
+
+        prompt_text = scene["scene_description"]
+        logger.debug("Generating video with prompt: %s...", prompt_text[:100])
+
+        async with render_slots:
+            # --- Generate video ---
+            operation = await asyncio.to_thread(
+                genai_client.models.generate_videos,
+                model="veo-3.1-generate-preview",
+                prompt="generate a video from the reference image following the prompt: " + prompt_text,
+                config=GenerateVideosConfig(
+                    reference_images=[reference_image],
+                    aspect_ratio="16:9",
+                    # output_gcs_uri=output_gcs_uri,
+                ),
+            )
+
+            # --- Poll until completion, backing off while Veo renders ---
+            logger.debug("Waiting for video generation to complete...")
+            delay = VEO_POLL_INITIAL_SECONDS
+            while not operation.done:
+                await asyncio.sleep(delay)
+                operation = await asyncio.to_thread(genai_client.operations.get, operation)
+                logger.debug("Still processing...")
+                delay = min(delay * 1.5, VEO_POLL_MAX_SECONDS)
+
+        logger.debug("Downloading video...")
+        video = operation.response.generated_videos[0]
+        await asyncio.to_thread(genai_client.files.download, file=video.video)
+
+        output_path = VIDEO_DIR / slug / "video" / f"scene{i}.mp4"
+        await asyncio.to_thread(output_path.parent.mkdir, parents=True, exist_ok=True)
+        await asyncio.to_thread(video.video.save, str(output_path))
+
+        logger.info("Video saved to %s", output_path)
+
+        return {
+            "scene": i,
+            "status": "success",
+            "output_path": str(output_path),
+            "public_url": public_url_for_path(output_path),
+            "description": prompt_text[:100] + "..." if len(prompt_text) > 100 else prompt_text,
+            "voice_over": scene.get("voice_over_text", "")
+        }
+
+    except Exception as e:
+        logger.error("Error processing scene %s: %s", i, e)
+        return {"scene": i, "status": "error", "message": str(e)}
+
+
 @router.post("/generate-videos")
 async def generate_veo3_videos(
     website: Optional[str] = Query(None, description="Website URL used to scope assets"),
+    genai_client: genai.Client = Depends(get_genai_client),
 ):
     """Generate Veo 3 videos for all storyboard scenes."""
 
@@ -1166,8 +1502,7 @@ async def generate_veo3_videos(
         raise HTTPException(status_code=404, detail=f"Storyboard JSON not found: {json_path}")
 
     try:
-        with open(json_path, "r") as f:
-            scenes = json.load(f)
+        scenes = await read_storyboard(json_path)
     except json.JSONDecodeError as e:
         raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
 
@@ -1178,84 +1513,12 @@ async def generate_veo3_videos(
     fallback_existing = existing_scene_videos(slug)
 
     try:
-        # Loop through scenes
-        for i, scene in enumerate(scenes, start=1):
-            try:
-                print(f"\n{'=' * 60}")
-                print(f"Processing Scene {i}/{len(scenes)}")
-                print(f"{'=' * 60}")
-
-                if "scene_description" not in scene:
-                    results.append({"scene": i, "status": "error", "message": "Missing scene_description"})
-                    continue
-
-                image_path = scene_image_path(slug, i)
-                if not image_path.exists():
-                    results.append({"scene": i, "status": "error", "message": f"Missing image: {image_path}"})
-                    continue
-
-                print(f"Loading reference image: {image_path}")
-
-                # --- Load image as bytes ---
-                with open(image_path, "rb") as img_file:
-                    image_bytes = img_file.read()
-
-                mime_type, _ = mimetypes.guess_type(str(image_path))
-                if not mime_type:
-                    mime_type = "image/png"
-
-                # ✅ Correctly create reference image
-                reference_image = VideoGenerationReferenceImage(
-                    image=GImage(
-                        image_bytes=image_bytes,
-                        mime_type=mime_type
-                    ),
-                    reference_type="asset"
-                )
-
-                prompt_text = scene["scene_description"]
-                print(f"🎬 Generating video with prompt: {prompt_text[:100]}...")
-
-                # --- Generate video ---
-                operation = client.models.generate_videos(
-                    model="veo-3.1-generate-preview",
-                    prompt="generate a video from the reference image following the prompt: " + prompt_text,
-                    config=GenerateVideosConfig(
-                        reference_images=[reference_image],
-                        aspect_ratio="16:9",
-                        # output_gcs_uri=output_gcs_uri,
-                    ),
-                )
-
-                # --- Poll until completion ---
-                print("⌛ Waiting for video generation to complete...")
-                while not operation.done:
-                    time.sleep(10)
-                    operation = client.operations.get(operation)
-                    print("Still processing...")
-
-                print("📥 Downloading video...")
-                video = operation.response.generated_videos[0]
-                client.files.download(file=video.video)
-
-                output_path = VIDEO_DIR / slug / "video" / f"scene{i}.mp4"
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-                video.video.save(str(output_path))
-
-                print(f"✅ Video saved to {output_path}")
-
-                results.append({
-                    "scene": i,
-                    "status": "success",
-                    "output_path": str(output_path),
-                    "public_url": public_url_for_path(output_path),
-                    "description": prompt_text[:100] + "..." if len(prompt_text) > 100 else prompt_text,
-                    "voice_over": scene.get("voice_over_text", "")
-                })
-
-            except Exception as e:
-                print(f"✗ Error processing scene {i}: {str(e)}")
-                results.append({"scene": i, "status": "error", "message": str(e)})
+        # Veo renders take minutes each; run scenes side by side, VIDEO_CONCURRENCY rendering at a time.
+        render_slots = asyncio.Semaphore(VIDEO_CONCURRENCY)
+        results = list(await asyncio.gather(*(
+            _generate_scene_video(genai_client, render_slots, slug, i, len(scenes), scene)
+            for i, scene in enumerate(scenes, start=1)
+        )))
     except Exception as exc:
         if fallback_existing:
             results = fallback_existing
@@ -1276,6 +1539,33 @@ async def generate_veo3_videos(
         "results": results,
     })
 
+def _has_scene_videos(video_dir: Path) -> bool:
+    try:
+        with os.scandir(video_dir) as entries:
+            return any(entry.name.startswith("scene") and entry.name.endswith(".mp4") for entry in entries)
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
+
+def _final_video_inputs_digest(video_dir: Path, audio_dir: Path) -> str:
+    """Fingerprint the stitch inputs by directory, file name, size and mtime."""
+    digest = hashlib.sha256()
+    for directory in (video_dir, audio_dir):
+        digest.update(str(directory).encode("utf-8"))
+        try:
+            with os.scandir(directory) as entries:
+                stats = sorted(
+                    (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+                    for entry in entries
+                    if entry.is_file()
+                )
+        except (FileNotFoundError, NotADirectoryError):
+            stats = []
+        for name, size, mtime_ns in stats:
+            digest.update(f"\0{name}\0{size}\0{mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()
+
+
 @router.post("/generate_final_video")
 def generate_final_video(website: Optional[str] = Query(None, description="Website URL used to scope assets")):
     """Combine generated scene videos with any available voiceovers into a single file."""
@@ -1288,9 +1578,9 @@ def generate_final_video(website: Optional[str] = Query(None, description="Websi
     final_video_path.parent.mkdir(parents=True, exist_ok=True)
 
     # Fallback to default slug assets only if the requested slug has no content
-    if not video_dir.exists() or not any(video_dir.glob("scene*.mp4")):
+    if not _has_scene_videos(video_dir):
         default_dir = Path(OUTPUT_PATH) / "default" / "video"
-        if slug != "default" and default_dir.exists() and any(default_dir.glob("scene*.mp4")):
+        if slug != "default" and _has_scene_videos(default_dir):
             video_dir = default_dir
             audio_dir = Path(OUTPUT_PATH) / "default" / "audio"
         else:
@@ -1299,17 +1589,29 @@ def generate_final_video(website: Optional[str] = Query(None, description="Websi
                 detail=f"No generated videos found for slug '{slug}'"
             )
 
-    try:
-        process_scenes_and_join(
-            video_dir=str(video_dir),
-            audio_dir=str(audio_dir),
-            final_output=str(final_video_path)
-        )
-    except Exception as exc:  # pragma: no cover - defensive logging
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to combine scenes into final video: {exc}"
-        )
+    # Skip the stitch when the inputs are unchanged since the last successful run.
+    inputs_digest = _final_video_inputs_digest(video_dir, audio_dir)
+    digest_path = final_video_path.with_name(final_video_path.name + ".inputs")
+    reused = (
+        final_video_path.exists()
+        and digest_path.exists()
+        and digest_path.read_text(encoding="utf-8") == inputs_digest
+    )
+
+    if not reused:
+        try:
+            process_scenes_and_join(
+                video_dir=str(video_dir),
+                audio_dir=str(audio_dir),
+                final_output=str(final_video_path)
+            )
+        except Exception as exc:  # pragma: no cover - defensive logging
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to combine scenes into final video: {exc}"
+            )
+        if final_video_path.exists():
+            digest_path.write_text(inputs_digest, encoding="utf-8")
 
     if not final_video_path.exists():
         raise HTTPException(
@@ -1323,6 +1625,7 @@ def generate_final_video(website: Optional[str] = Query(None, description="Websi
         "final_video": str(relative_path),
         "video_dir": str(video_dir.relative_to(Path.cwd())),
         "audio_dir": str(audio_dir.relative_to(Path.cwd())),
+        "reused": reused,
     }
 
 
@@ -1344,7 +1647,7 @@ async def generate_voiceovers_endpoint(
 
     - **voice_id**: Optional ElevenLabs voice ID (defaults to Rachel)
     """
-    print("🟢 [generate_voiceovers] Called /generate-voiceovers endpoint")
+    logger.info("Called /generate-voiceovers endpoint")
 
     try:
         slug = website_to_slug(website)
@@ -1352,11 +1655,10 @@ async def generate_voiceovers_endpoint(
         if not json_path.exists():
             json_path = STORYBOARD_PATH
 
-        print(f"📂 [generate_voiceovers] Loading storyboard from: {json_path}")
+        logger.debug("Loading storyboard from: %s", json_path)
 
-        with open(json_path, "r", encoding="utf-8") as f:
-            storyboard_data = json.load(f)
-            print(f"✅ [generate_voiceovers] Loaded {len(storyboard_data)} storyboard entries")
+        storyboard_data = await read_storyboard(json_path)
+        logger.info("Loaded %s storyboard entries", len(storyboard_data))
 
         if not isinstance(storyboard_data, list):
             raise ValueError("Storyboard JSON must be an array")
@@ -1375,7 +1677,7 @@ async def generate_voiceovers_endpoint(
         successful = sum(1 for r in results if r.get("success"))
         failed = len(results) - successful
 
-        print(f"🏁 [generate_voiceovers] Completed: {successful} successful, {failed} failed")
+        logger.info("Completed: %s successful, %s failed", successful, failed)
 
         return {
             "success": True,
@@ -1391,7 +1693,7 @@ async def generate_voiceovers_endpoint(
             detail=f"Storyboard file not found. Please generate storyboard first."
         )
     except Exception as e:
-        print(f"❌ [generate_voiceovers] Exception: {str(e)}")
+        logger.error("generate_voiceovers failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Voiceover generation failed: {str(e)}"
@@ -1414,20 +1716,35 @@ class DraftDetail(DraftSummary):
     video_files: List[str] = Field(default_factory=list)
 
 
-def _public_urls_for_glob(target_dir: Path, pattern: str) -> List[str]:
-    if not target_dir.exists():
+def _scan_public_urls(target_dir: Path, prefix: str, suffix: str) -> List[str]:
+    """Return public URLs for files in ``target_dir`` named ``prefix*suffix``, sorted by name."""
+    try:
+        with os.scandir(target_dir) as entries:
+            names = sorted(
+                entry.name
+                for entry in entries
+                if entry.name.startswith(prefix) and entry.name.endswith(suffix) and entry.is_file()
+            )
+    except (FileNotFoundError, NotADirectoryError):
         return []
-    return [public_url_for_path(path) for path in sorted(target_dir.glob(pattern))]
+    return [public_url_for_path(target_dir / name) for name in names]
+
+
+def _draft_files(draft_root: Path) -> Tuple[List[str], List[str], List[str]]:
+    """Scan a draft's images, audio and video folders once each."""
+    return (
+        _scan_public_urls(draft_root / "images", "scene", ".png"),
+        _scan_public_urls(draft_root / "audio", "", ".mp3"),
+        _scan_public_urls(draft_root / "video", "scene", ".mp4"),
+    )
 
 
-def _summarize_draft(slug: str) -> DraftSummary:
+def _summarize_draft(slug: str, files: Optional[Tuple[List[str], List[str], List[str]]] = None) -> DraftSummary:
     safe = safe_slug(slug)
     draft_root = GENERATED_SCENES_BASE / safe
     storyboard_file = storyboard_path_for_slug(safe)
 
-    scenes = _public_urls_for_glob(draft_root / "images", "scene*.png")
-    voiceovers = _public_urls_for_glob(draft_root / "audio", "*.mp3")
-    videos = _public_urls_for_glob(draft_root / "video", "scene*.mp4")
+    scenes, voiceovers, videos = files if files is not None else _draft_files(draft_root)
     final_video_path = draft_root / "final_video.mp4"
 
     summary = DraftSummary(
@@ -1442,23 +1759,22 @@ def _summarize_draft(slug: str) -> DraftSummary:
 
 
 def _load_draft(slug: str) -> DraftDetail:
-    summary = _summarize_draft(slug)
     safe = safe_slug(slug)
     draft_root = GENERATED_SCENES_BASE / safe
     storyboard_file = storyboard_path_for_slug(safe)
 
+    # One listing per folder feeds both the counts and the file lists.
+    files = _draft_files(draft_root)
+    summary = _summarize_draft(safe, files)
+    scene_images, voiceover_files, video_files = files
+
     storyboard_data = None
     if storyboard_file.exists():
         try:
-            with open(storyboard_file, "r", encoding="utf-8") as f:
-                storyboard_data = json.load(f)
+            storyboard_data = orjson.loads(storyboard_file.read_bytes())
         except Exception:
             storyboard_data = None
 
-    scene_images = _public_urls_for_glob(draft_root / "images", "scene*.png")
-    voiceover_files = _public_urls_for_glob(draft_root / "audio", "*.mp3")
-    video_files = _public_urls_for_glob(draft_root / "video", "scene*.mp4")
-
     return DraftDetail(
         **summary.model_dump(),
         storyboard=storyboard_data if isinstance(storyboard_data, list) else None,
@@ -1468,17 +1784,59 @@ def _load_draft(slug: str) -> DraftDetail:
     )
 
 
+def _mtime_ns(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _draft_stamp(slug: str) -> str:
+    """
+    Summarize everything a draft listing depends on as mtimes.
+
+    Adding, removing or replacing a media file bumps its folder's mtime, and
+    storyboard edits bump the storyboard file's, so these few stats change
+    whenever the listing would.
+    """
+    draft_root = GENERATED_SCENES_BASE / slug
+    paths = (
+        draft_root,
+        draft_root / "images",
+        draft_root / "audio",
+        draft_root / "video",
+        storyboard_path_for_slug(slug),
+    )
+    return slug + ":" + ",".join(str(_mtime_ns(path)) for path in paths)
+
+
+def _etag(*parts: str) -> str:
+    return '"' + hashlib.md5("|".join(parts).encode("utf-8")).hexdigest() + '"'
+
+
+def _not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Return a 304 if the client already has ``etag``; otherwise tag ``response`` with it."""
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
+
+
 @router.get("/drafts")
-def list_drafts() -> dict:
+def list_drafts(request: Request, response: Response) -> dict:
     """Return a summary of all drafts discovered under generated_scenes."""
 
     if not GENERATED_SCENES_BASE.exists():
         return {"drafts": []}
 
-    drafts: List[DraftSummary] = []
-    for entry in sorted(GENERATED_SCENES_BASE.iterdir()):
-        if entry.is_dir():
-            drafts.append(_summarize_draft(entry.name))
+    with os.scandir(GENERATED_SCENES_BASE) as entries:
+        names = sorted(entry.name for entry in entries if entry.is_dir())
+    etag = _etag(str(_mtime_ns(GENERATED_SCENES_BASE)), *(_draft_stamp(name) for name in names))
+    not_modified = _not_modified(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+
+    drafts: List[DraftSummary] = [_summarize_draft(name) for name in names]
 
     return {"drafts": [d.model_dump() for d in drafts]}
 
@@ -1503,7 +1861,7 @@ def save_draft(payload: SaveDraftRequest):
 
 
 @router.get("/drafts/{slug}")
-def get_draft(slug: str):
+def get_draft(slug: str, request: Request, response: Response):
     """Return storyboard, scenes, videos, and voiceovers for a specific draft slug."""
 
     safe = safe_slug(slug)
@@ -1511,6 +1869,10 @@ def get_draft(slug: str):
     if not draft_root.exists():
         raise HTTPException(status_code=404, detail=f"Draft '{safe}' not found")
 
+    not_modified = _not_modified(request, response, _etag(_draft_stamp(safe)))
+    if not_modified is not None:
+        return not_modified
+
     detail = _load_draft(safe)
     return detail.model_dump()
 
@@ -1,21 +1,82 @@
 """Application factory for the FastAPI service."""
 
+import logging
+import os
+import queue
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from starlette.responses import Response
 
 from app.api import routes
+from app.core.http import SHARED_HTTPX
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles that makes browsers revalidate generated media on every view.
+
+    Regenerated scenes, voiceovers and the re-stitched final video keep their
+    file names, and most frontend URLs carry no cache buster, so a max-age would
+    serve stale media. ``no-cache`` still lets the browser keep its copy:
+    Starlette sends an ETag and answers If-None-Match with a 304, so an
+    unchanged file costs a round trip but no body.
+    """
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers.setdefault("Cache-Control", "no-cache")
+        return response
+
+
+def start_log_listener() -> QueueListener:
+    """
+    Send root log records through a queue so formatting and stream writes happen
+    on the listener's thread instead of the event loop.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(log_queue)]
+    root.setLevel(LOG_LEVEL)
+
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start log forwarding, create the shared API clients, and release them on shutdown."""
+    listener = start_log_listener()
+    app.state.genai = routes.create_genai_client()
+    app.state.openai = routes.create_openai_client()
+    routes.bind_clients(app.state.genai, app.state.openai)
+    try:
+        yield
+        await app.state.openai.close()
+        SHARED_HTTPX.close()
+    finally:
+        listener.stop()
+
+
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application instance."""
     app = FastAPI(
         title="Nano Banana Image Generator",
         description="Generate and edit images using Google's Gemini 2.5 Flash Image model",
+        lifespan=lifespan,
     )
 
     app.add_middleware(
@@ -30,7 +91,7 @@ def create_app() -> FastAPI:
         try:
             app.mount(
                 f"/{mount_path}",
-                StaticFiles(directory=str(BASE_DIR / mount_path)),
+                CachedStaticFiles(directory=str(BASE_DIR / mount_path)),
                 name=mount_path,
             )
         except Exception:
@@ -0,0 +1,21 @@
+"""Shared HTTP transport settings for the provider SDK clients."""
+
+import httpx
+
+# Concurrent TTS and image calls reuse pooled connections and multiplex over
+# HTTP/2 instead of opening a fresh TLS connection per request.
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+
+SHARED_HTTPX = httpx.Client(http2=True, timeout=60, limits=HTTP_LIMITS)
+
+
+def genai_http_options():
+    """HTTP options giving a ``genai.Client`` the same pooled HTTP/2 transport."""
+    from google.genai import types as genai_types
+
+    # genai builds its own httpx clients, so pass the settings rather than SHARED_HTTPX.
+    client_args = {"http2": True, "limits": HTTP_LIMITS}
+    return genai_types.HttpOptions(client_args=client_args, async_client_args=dict(client_args))
+
+
+__all__ = ["HTTP_LIMITS", "SHARED_HTTPX", "genai_http_options"]
@@ -1,15 +1,94 @@
 """Helpers to mix and stitch together video scenes using ffmpeg."""
 
+import functools
 import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import Iterable, List, Optional, Tuple
 
 import ffmpeg
 
+from media_info import media_duration
 
-def combine_video_audio(video_file: str, audio_file: str, output_file: str, keep_original_audio: bool = True):
-    """Combine a video file with an audio file."""
+
+# Audio settings for per-scene intermediates, so their streams match and the
+# final concat can stream-copy regardless of each source's sample rate/layout.
+NORMALIZED_AUDIO = {'acodec': 'aac', 'ar': 48000, 'ac': 2}
+SILENT_AUDIO = 'anullsrc=r=48000:cl=stereo'
+
+# Per-scene ffmpeg processes run side by side, each limited to a few threads.
+SCENE_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+SCENE_ENCODE_THREADS = 2
+
+# H.264 encoders in order of preference, with the fastest sensible preset for each.
+VIDEO_ENCODER_PRESETS = {
+    'h264_nvenc': {'preset': 'p1'},
+    'h264_qsv': {'preset': 'veryfast'},
+    'h264_videotoolbox': {},
+    'libx264': {'preset': 'veryfast', 'tune': 'fastdecode'},
+}
+
+
+def _encoder_works(encoder: str) -> bool:
+    # Being listed by ``ffmpeg -encoders`` doesn't mean the GPU/driver is present,
+    # so encode a few blank frames to be sure.
+    try:
+        subprocess.run(
+            ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-f', 'lavfi',
+             '-i', 'color=size=256x256:duration=0.1', '-c:v', encoder, '-f', 'null', '-'],
+            check=True, capture_output=True, timeout=30,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return True
+
+
+@functools.lru_cache(maxsize=1)
+def _select_video_encoder() -> str:
+    """Pick the H.264 encoder to use; ``ADGENT_VIDEO_ENCODER`` overrides detection."""
+    override = os.getenv('ADGENT_VIDEO_ENCODER')
+    if override:
+        return override
+    try:
+        listed = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-encoders'],
+            check=True, capture_output=True, text=True, timeout=30,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return 'libx264'
+    for encoder in VIDEO_ENCODER_PRESETS:
+        if encoder == 'libx264' or (f' {encoder} ' in listed and _encoder_works(encoder)):
+            return encoder
+    return 'libx264'
+
+
+def video_encode_args() -> dict:
+    """ffmpeg output options for an H.264 encode with the selected encoder."""
+    encoder = _select_video_encoder()
+    return {
+        'vcodec': encoder,
+        **VIDEO_ENCODER_PRESETS.get(encoder, {}),
+        'pix_fmt': 'yuv420p',
+        'movflags': '+faststart',
+    }
+
+
+def combine_video_audio(
+    video_file: str,
+    audio_file: str,
+    output_file: str,
+    keep_original_audio: bool = True,
+    copy_video: bool = False,
+    threads: Optional[int] = None,
+):
+    """Combine a video file with an audio file; ``copy_video`` keeps the video stream as-is."""
     video = ffmpeg.input(video_file)
     audio_track = ffmpeg.input(audio_file)
+    encode_args = dict(NORMALIZED_AUDIO, **({'vcodec': 'copy'} if copy_video else video_encode_args()))
+    if threads:
+        encode_args['threads'] = threads
 
     if keep_original_audio:
         # Mix original video audio with new audio track
@@ -22,42 +101,270 @@ def combine_video_audio(video_file: str, audio_file: str, output_file: str, keep
             weights='1 1'
         )
         output = ffmpeg.output(video.video, mixed_audio, output_file,
-                               vcodec='libx264', acodec='aac', shortest=None)
+                               shortest=None, **encode_args)
     else:
         # Replace original audio with new audio track
         output = ffmpeg.output(video.video, audio_track, output_file,
-                               vcodec='libx264', acodec='aac', shortest=None)
+                               shortest=None, **encode_args)
 
     ffmpeg.run(output, overwrite_output=True, quiet=True)
     print(f"✓ Combined: {output_file}")
 
 
-def join_videos(video_files: Iterable[str], output_file: str) -> None:
-    """Join multiple MP4 videos into one output file."""
-    concat_file = 'temp_filelist.txt'
+def _has_audio(media_file: str) -> bool:
+    try:
+        return any(stream.get('codec_type') == 'audio' for stream in _probe(media_file)['streams'])
+    except (ffmpeg.Error, KeyError):
+        # Can't tell; assume it does, as before.
+        return True
+
+
+def normalize_audio(video_file: str, output_file: str) -> None:
+    """
+    Copy a video's picture and re-encode only its audio to ``NORMALIZED_AUDIO``.
+
+    Videos without an audio track get a silent one, so every intermediate has
+    the same streams and the final concat can still stream-copy.
+    """
+    video = ffmpeg.input(video_file)
+    if _has_audio(video_file):
+        output = ffmpeg.output(video, output_file, vcodec='copy', **NORMALIZED_AUDIO)
+    else:
+        silence = ffmpeg.input(SILENT_AUDIO, f='lavfi')
+        output = ffmpeg.output(video.video, silence.audio, output_file,
+                               vcodec='copy', shortest=None, **NORMALIZED_AUDIO)
+    ffmpeg.run(output, overwrite_output=True, quiet=True)
+    print(f"✓ Normalized audio: {output_file}")
 
+
+@functools.lru_cache(maxsize=512)
+def _probe_cached(media_file: str, mtime_ns: int, size: int) -> dict:
+    return ffmpeg.probe(media_file)
+
+
+def _probe(media_file: str) -> dict:
+    """ffmpeg.probe, memoized by path, mtime and size so each file is probed once."""
+    try:
+        stat = os.stat(media_file)
+    except OSError as exc:
+        raise ffmpeg.Error('ffprobe', b'', str(exc).encode()) from exc
+    return _probe_cached(os.path.abspath(media_file), stat.st_mtime_ns, stat.st_size)
+
+
+def _stream_signature(media_file: str, codec_types: Tuple[str, ...] = ('video', 'audio')) -> Optional[tuple]:
+    """Summarize the codec parameters that must agree for a stream-copy concat."""
     try:
-        # Write video files to concat list
-        with open(concat_file, 'w') as f:
-            for video in video_files:
-                abs_path = os.path.abspath(video)
-                f.write(f"file '{abs_path}'\n")
-
-        # Concatenate videos
-        concat_input = ffmpeg.input(concat_file, format='concat', safe=0)
+        streams = _probe(media_file)['streams']
+    except (ffmpeg.Error, KeyError):
+        return None
+    return tuple(
+        (
+            stream.get('codec_type'),
+            stream.get('codec_name'),
+            stream.get('profile'),
+            stream.get('level'),
+            stream.get('time_base'),
+            stream.get('width'),
+            stream.get('height'),
+            stream.get('pix_fmt'),
+            stream.get('r_frame_rate'),
+            stream.get('sample_rate'),
+            stream.get('channels'),
+        )
+        for stream in streams
+        if stream.get('codec_type') in codec_types
+    )
+
+
+def _share_parameters(media_files: List[str], codec_types: Tuple[str, ...] = ('video', 'audio')) -> bool:
+    """Probe ``media_files`` in parallel and report whether their streams all match."""
+    if not media_files:
+        return False
+    with ThreadPoolExecutor(max_workers=min(8, len(media_files))) as pool:
+        signatures = set(pool.map(lambda f: _stream_signature(f, codec_types), media_files))
+    return len(signatures) == 1 and None not in signatures
+
+
+def _concat_list(video_files: List[str]) -> bytes:
+    """Build a concat-demuxer list, quoting paths the way ffconcat expects."""
+    lines = []
+    for video in video_files:
+        abs_path = os.path.abspath(video).replace("'", "'\\''")
+        lines.append(f"file '{abs_path}'\n")
+    return "".join(lines).encode("utf-8")
+
+
+def join_videos(video_files: Iterable[str], output_file: str) -> None:
+    """Join multiple MP4 videos into one output file, stream-copying when they already match."""
+    video_files = list(video_files)
+
+    # The concat list goes to ffmpeg on stdin, so concurrent joins can't clobber
+    # each other's list file.
+    concat_input = ffmpeg.input('pipe:', format='concat', safe=0, protocol_whitelist='file,pipe')
+    if _share_parameters(video_files):
+        output = ffmpeg.output(concat_input, output_file, c='copy', movflags='+faststart')
+    else:
         output = ffmpeg.output(
             concat_input,
             output_file,
-            vcodec='libx264',
-            acodec='aac'
+            acodec='aac',
+            **video_encode_args()
         )
 
-        ffmpeg.run(output, overwrite_output=True, quiet=True)
-        print(f"✓ Successfully created final video: {output_file}")
+    process = ffmpeg.run_async(output, pipe_stdin=True, overwrite_output=True, quiet=True)
+    out, err = process.communicate(input=_concat_list(video_files))
+    if process.returncode:
+        raise ffmpeg.Error('ffmpeg', out, err)
+    print(f"✓ Successfully created final video: {output_file}")
+
+
+def _probe_duration(media_file: str) -> Optional[float]:
+    duration = media_duration(media_file)
+    if duration:
+        return duration
+    try:
+        return float(_probe(media_file)["format"]["duration"])
+    except (ffmpeg.Error, KeyError, ValueError):
+        return None
+
+
+def _video_format(video_file: str) -> Optional[Tuple[int, int, str]]:
+    """Return the (width, height, frame rate) of a file's first video stream."""
+    try:
+        streams = _probe(video_file)['streams']
+    except (ffmpeg.Error, KeyError):
+        return None
+    for stream in streams:
+        if stream.get('codec_type') == 'video' and stream.get('width') and stream.get('height'):
+            return int(stream['width']), int(stream['height']), stream.get('r_frame_rate') or '30'
+    return None
+
 
+def _conform(video, video_format: Optional[Tuple[int, int, str]]):
+    """
+    Scale, pad and retime a video stream to ``video_format``.
+
+    The concat filter rejects segments whose size or aspect differ, which is
+    exactly the case that reaches ``fuse_scenes``.
+    """
+    if video_format is None:
+        return video
+    width, height, fps = video_format
+    return (
+        video
+        .filter('scale', width, height, force_original_aspect_ratio='decrease')
+        .filter('pad', width, height, '(ow-iw)/2', '(oh-ih)/2')
+        .filter('setsar', 1)
+        .filter('fps', fps=fps)
+    )
+
+
+def _scene_streams(
+    video_file: str,
+    audio_file: Optional[str],
+    video_format: Optional[Tuple[int, int, str]] = None,
+):
+    """Return the (video, audio) streams one scene contributes to the concat filter."""
+    video = ffmpeg.input(video_file)
+    picture = _conform(video.video, video_format)
+    if not audio_file:
+        # No voiceover - keep the scene's own audio track, or silence if it has none,
+        # since concat needs an audio stream from every segment.
+        duration = None if _has_audio(video_file) else _probe_duration(video_file)
+        if duration is None:
+            return picture, video.audio
+        return picture, ffmpeg.input(SILENT_AUDIO, f='lavfi', t=duration).audio
+
+    # Voiceover replaces the embedded audio; cut both to the shorter of the two
+    # like ``shortest`` does, since concat would otherwise pad the gap.
+    audio = ffmpeg.input(audio_file).audio
+    durations = [d for d in (_probe_duration(video_file), _probe_duration(audio_file)) if d]
+    if not durations:
+        return picture, audio
+    duration = min(durations)
+    return (
+        _conform(video.video.trim(duration=duration).setpts('PTS-STARTPTS'), video_format),
+        audio.filter('atrim', duration=duration).filter('asetpts', 'PTS-STARTPTS'),
+    )
+
+
+def fuse_scenes(scenes: List[Tuple[str, Optional[str]]], output_file: str) -> None:
+    """
+    Mux every scene with its voiceover and concatenate them in a single encode.
+
+    Every segment is conformed to the first scene's size and frame rate first,
+    since only scenes whose video parameters differ take this path.
+    """
+    video_format = _video_format(scenes[0][0])
+    streams = []
+    for scene in scenes:
+        streams.extend(_scene_streams(scene[0], scene[1] if len(scene) > 1 else None, video_format))
+
+    joined = ffmpeg.concat(*streams, v=1, a=1).node
+    output = ffmpeg.output(joined[0], joined[1], output_file, acodec='aac', **video_encode_args())
+    ffmpeg.run(output, overwrite_output=True, quiet=True)
+    print(f"✓ Successfully created final video: {output_file}")
+
+
+def _combine_then_join(
+    scenes: List[Tuple[str, Optional[str]]],
+    final_output: str,
+    cleanup_temp: bool = True,
+    copy_video: bool = False,
+) -> None:
+    """
+    Stitch through per-scene temp files.
+
+    With ``copy_video`` only the audio is re-encoded, so the temp files keep the
+    generator's video stream and ``join_videos`` can stream-copy them together.
+    The temp files go in a private directory, so concurrent stitches for
+    different storyboards never share or delete each other's intermediates.
+    """
+    temp_dir = tempfile.mkdtemp(prefix='adgent_scenes_')
+    temp_videos = [os.path.join(temp_dir, f'temp_scene_{i}.mp4') for i in range(1, len(scenes) + 1)]
+
+    def prepare(i: int, scene: Tuple[str, Optional[str]], temp_output: str) -> None:
+        video_file = scene[0]
+        audio_file = scene[1] if len(scene) > 1 else None
+        print(f"  Processing scene {i}/{len(scenes)}...")
+
+        if audio_file:
+            # Always REPLACE embedded scene audio with voiceover
+            combine_video_audio(
+                video_file,
+                audio_file,
+                temp_output,
+                keep_original_audio=False,
+                copy_video=copy_video,
+                threads=None if copy_video else SCENE_ENCODE_THREADS,
+            )
+        elif copy_video:
+            normalize_audio(video_file, temp_output)
+        else:
+            # No audio file - just copy the video
+            shutil.copy(video_file, temp_output)
+            print(f"  ✓ Copied video (no voiceover): {temp_output}")
+
+    # Scenes are independent ffmpeg processes, so run several at once; each one
+    # gets a couple of encoder threads so they pack onto the cores evenly.
+    try:
+        print("\nStep 1: Combining videos with audio tracks...")
+        with ThreadPoolExecutor(max_workers=SCENE_WORKERS) as pool:
+            for future in [
+                pool.submit(prepare, i, scene, temp_output)
+                for i, (scene, temp_output) in enumerate(zip(scenes, temp_videos), 1)
+            ]:
+                future.result()
+
+        print("\nStep 2: Joining all scenes into final video...")
+        join_videos(temp_videos, final_output)
     finally:
-        if os.path.exists(concat_file):
-            os.remove(concat_file)
+        if cleanup_temp:
+            print("\nStep 3: Cleaning up temporary files...")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            print(f"  Removed: {temp_dir}")
+        else:
+            print(f"\nTemporary files kept in: {temp_dir}")
 
 
 def process_scenes_and_join(
@@ -100,36 +407,20 @@ def process_scenes_and_join(
     if not scenes:
         print("Error: No scenes provided!")
         return
-    temp_videos = []
-
-    print("\nStep 1: Combining videos with audio tracks...")
-    for i, scene in enumerate(scenes, 1):
-        video_file = scene[0]
-        audio_file = scene[1] if len(scene) > 1 else None
 
-        temp_output = f'temp_scene_{i}.mp4'
-        print(f"  Processing scene {i}/{len(scenes)}...")
-
-        if audio_file:
-            # Always REPLACE embedded scene audio with voiceover
-            combine_video_audio(video_file, audio_file, temp_output, keep_original_audio=False)
-        else:
-            # No audio file - just copy the video
-            import shutil
-            shutil.copy(video_file, temp_output)
-            print(f"  ✓ Copied video (no voiceover): {temp_output}")
-
-        temp_videos.append(temp_output)
-
-    print("\nStep 2: Joining all scenes into final video...")
-    join_videos(temp_videos, final_output)
+    if _share_parameters([scene[0] for scene in scenes], codec_types=('video',)):
+        # Scenes from one generator usually match, so only audio needs encoding.
+        print(f"\nStitching {len(scenes)} scene(s) with stream-copied video...")
+        _combine_then_join(scenes, final_output, cleanup_temp=cleanup_temp, copy_video=True)
+        print(f"\n✓ Complete! Final video: {final_output}")
+        return
 
-    if cleanup_temp:
-        print("\nStep 3: Cleaning up temporary files...")
-        for temp_file in temp_videos:
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
-                print(f"  Removed: {temp_file}")
+    print(f"\nStitching {len(scenes)} scene(s) in one pass...")
+    try:
+        fuse_scenes(scenes, final_output)
+    except ffmpeg.Error as exc:
+        print(f"  ⚠ Single-pass stitch failed ({exc}); falling back to per-scene temp files")
+        _combine_then_join(scenes, final_output, cleanup_temp=cleanup_temp)
 
     print(f"\n✓ Complete! Final video: {final_output}")
 
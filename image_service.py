@@ -1,31 +1,175 @@
 """Thin wrapper around the Gemini image API used by the ad generator."""
 
+import asyncio
 import base64
+import functools
+import hashlib
+import io
 import os
-from typing import Iterable, Union
+import threading
+from typing import Iterable, List, Optional, Union
 
+import cachetools
+import diskcache
 from dotenv import load_dotenv
-from google import genai
 from PIL import Image
 
+from app.core.http import genai_http_options
+
 load_dotenv()
 
 API_KEY = os.getenv("GOOGLE_API_KEY")
-if not API_KEY:
-    raise ValueError("GOOGLE_API_KEY environment variable not set")
 
 MODEL_NAME = os.getenv("GOOGLE_IMAGE_MODEL", "gemini-2.5-flash-image-preview")
 
-_client = genai.Client(api_key=API_KEY)
 
+@functools.lru_cache(maxsize=1)
+def _get_client():
+    # Importing google.genai is slow; only pay for it (and require the key) on first use.
+    if not API_KEY:
+        raise ValueError("GOOGLE_API_KEY environment variable not set")
+    from google import genai
+
+    return genai.Client(api_key=API_KEY, http_options=genai_http_options())
+
+
+# Generated images keyed by a hash of the exact request, so re-running a storyboard
+# with unchanged prompts and references reads the earlier result from disk.
+# PNGs run to a few MB each, so entries expire and the directory is size-capped.
+IMAGE_CACHE_TTL_SECONDS = int(os.getenv("GEMINI_IMAGE_CACHE_TTL_SECONDS", "604800"))
+IMAGE_CACHE_SIZE_LIMIT = int(os.getenv("GEMINI_IMAGE_CACHE_SIZE_MB", "1024")) * 1024 * 1024
+_disk_cache = diskcache.Cache(
+    os.getenv("GEMINI_IMAGE_CACHE", ".cache/gemini_images"),
+    size_limit=IMAGE_CACHE_SIZE_LIMIT,
+)
+# Recent hits kept in memory too; PNGs run to a few MB, so keep this small.
+_memory_cache: cachetools.LRUCache = cachetools.LRUCache(maxsize=32)
+# cachetools caches are not thread-safe, and the async API reaches them from
+# asyncio.to_thread workers; every access to them goes through this lock.
+_memory_lock = threading.Lock()
+
+# Reference images uploaded through the Files API, by pixel hash, so repeat
+# requests send a file URI instead of the image bytes. Gemini deletes uploads
+# after 48 hours; stop reusing them an hour before that.
+FILES_API_TTL_SECONDS = 47 * 3600
+_uploaded_files: cachetools.TTLCache = cachetools.TTLCache(maxsize=256, ttl=FILES_API_TTL_SECONDS)
+
+
+def _image_key(img: Image.Image) -> str:
+    data = img.tobytes()
+    digest = hashlib.blake2b(f"{img.mode}:{img.size[0]}x{img.size[1]}:".encode("utf-8"), digest_size=16)
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _image_keys(contents: List[Union[str, Image.Image]]) -> List[Optional[str]]:
+    return [_image_key(item) if isinstance(item, Image.Image) else None for item in contents]
+
+
+def _cache_key(contents: List[Union[str, Image.Image]], image_keys: List[Optional[str]]) -> str:
+    digest = hashlib.blake2b(MODEL_NAME.encode("utf-8"), digest_size=16)
+    for item, image_key in zip(contents, image_keys):
+        if image_key is not None:
+            data = image_key.encode("utf-8")
+            header = "image:"
+        else:
+            data = str(item).encode("utf-8")
+            header = f"text:{len(data)}"
+        digest.update(header.encode("utf-8"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def _read_cached(key: str) -> Optional[bytes]:
+    with _memory_lock:
+        cached = _memory_cache.get(key)
+    if cached is not None:
+        return cached
+    cached = _disk_cache.get(key)
+    if cached is None:
+        return None
+    with _memory_lock:
+        _memory_cache[key] = cached
+    return cached
+
+
+def _write_cached(key: str, image_bytes: bytes) -> None:
+    with _memory_lock:
+        _memory_cache[key] = image_bytes
+    _disk_cache.set(key, image_bytes, expire=IMAGE_CACHE_TTL_SECONDS)
+
+
+def _encode_png_fast(img: Image.Image) -> bytes:
+    """PNG-encode with light zlib compression; level 1 is several times faster than the default 6."""
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def _inline_image(img: Image.Image):
+    from google.genai import types
+
+    # The SDK PNG-encodes PNG/RGBA images at the default level itself; pre-encode
+    # those faster. Everything else it sends as JPEG, which is already quick.
+    if img.format == "PNG" or img.mode == "RGBA":
+        return types.Part.from_bytes(data=_encode_png_fast(img), mime_type="image/png")
+    return img
 
-def generate_image_bytes(contents: Iterable[Union[str, Image.Image]]) -> bytes:
-    """Call Gemini image model with provided contents and return raw PNG bytes."""
-    response = _client.models.generate_content(
-        model=MODEL_NAME,
-        contents=list(contents),
-    )
 
+def _upload_config():
+    from google.genai import types
+
+    return types.UploadFileConfig(mime_type="image/png")
+
+
+def _request_contents(contents: List[Union[str, Image.Image]], image_keys: List[Optional[str]]) -> list:
+    """Swap each image for a Files API handle, uploading it the first time it is seen."""
+    request = []
+    for item, image_key in zip(contents, image_keys):
+        if image_key is None:
+            request.append(item)
+            continue
+        with _memory_lock:
+            uploaded = _uploaded_files.get(image_key)
+        if uploaded is None:
+            try:
+                uploaded = _get_client().files.upload(
+                    file=io.BytesIO(_encode_png_fast(item)), config=_upload_config()
+                )
+            except Exception:
+                # Files API unavailable; the image can still go inline.
+                request.append(_inline_image(item))
+                continue
+            with _memory_lock:
+                _uploaded_files[image_key] = uploaded
+        request.append(uploaded)
+    return request
+
+
+async def _arequest_contents(contents: List[Union[str, Image.Image]], image_keys: List[Optional[str]]) -> list:
+    """Async variant of :func:`_request_contents`."""
+    request = []
+    for item, image_key in zip(contents, image_keys):
+        if image_key is None:
+            request.append(item)
+            continue
+        with _memory_lock:
+            uploaded = _uploaded_files.get(image_key)
+        if uploaded is None:
+            png = await asyncio.to_thread(_encode_png_fast, item)
+            try:
+                uploaded = await _get_client().aio.files.upload(file=io.BytesIO(png), config=_upload_config())
+            except Exception:
+                # Files API unavailable; the image can still go inline.
+                request.append(await asyncio.to_thread(_inline_image, item))
+                continue
+            with _memory_lock:
+                _uploaded_files[image_key] = uploaded
+        request.append(uploaded)
+    return request
+
+
+def _extract_image_bytes(response) -> bytes:
     for candidate in getattr(response, "candidates", []) or []:
         content = getattr(candidate, "content", None)
         if not content:
@@ -38,11 +182,61 @@ def generate_image_bytes(contents: Iterable[Union[str, Image.Image]]) -> bytes:
     raise RuntimeError("No image generated in response.")
 
 
+def generate_image_bytes(contents: Iterable[Union[str, Image.Image]]) -> bytes:
+    """Call Gemini image model with provided contents and return raw PNG bytes."""
+    contents = list(contents)
+    image_keys = _image_keys(contents)
+    key = _cache_key(contents, image_keys)
+    cached = _read_cached(key)
+    if cached is not None:
+        return cached
+
+    response = _get_client().models.generate_content(
+        model=MODEL_NAME,
+        contents=_request_contents(contents, image_keys),
+    )
+    image_bytes = _extract_image_bytes(response)
+    _write_cached(key, image_bytes)
+    return image_bytes
+
+
+async def agenerate_image_bytes(contents: Iterable[Union[str, Image.Image]]) -> bytes:
+    """Async variant of :func:`generate_image_bytes` using the SDK's aio client."""
+    contents = list(contents)
+    image_keys = await asyncio.to_thread(_image_keys, contents)
+    key = _cache_key(contents, image_keys)
+    cached = await asyncio.to_thread(_read_cached, key)
+    if cached is not None:
+        return cached
+
+    response = await _get_client().aio.models.generate_content(
+        model=MODEL_NAME,
+        contents=await _arequest_contents(contents, image_keys),
+    )
+    image_bytes = _extract_image_bytes(response)
+    await asyncio.to_thread(_write_cached, key, image_bytes)
+    return image_bytes
+
+
 def generate_image_base64_from_prompt(prompt: str) -> str:
     """Generate image bytes from a prompt and return them as a base64-encoded PNG string."""
     image_bytes = generate_image_bytes([prompt])
     return base64.b64encode(image_bytes).decode("utf-8")
 
 
-__all__ = ["API_KEY", "MODEL_NAME", "generate_image_bytes", "generate_image_base64_from_prompt"]
+async def agenerate_image_base64_from_prompt(prompt: str) -> str:
+    """Async variant of :func:`generate_image_base64_from_prompt`."""
+    image_bytes = await agenerate_image_bytes([prompt])
+    # Encoding a multi-MB PNG is CPU work; keep it off the event loop.
+    return await asyncio.to_thread(lambda: base64.b64encode(image_bytes).decode("utf-8"))
+
+
+__all__ = [
+    "API_KEY",
+    "MODEL_NAME",
+    "generate_image_bytes",
+    "generate_image_base64_from_prompt",
+    "agenerate_image_bytes",
+    "agenerate_image_base64_from_prompt",
+]
 
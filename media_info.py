@@ -0,0 +1,70 @@
+"""Read media durations from file headers without starting ffprobe.
+
+MP4 durations come from the ``moov/mvhd`` box and MP3 durations from mutagen's
+frame-header scan. Anything else, or a file that does not parse, returns None
+so callers can fall back to ``ffmpeg.probe``.
+"""
+
+import os
+import struct
+from typing import BinaryIO, Optional, Union
+
+from mutagen import MutagenError
+from mutagen.mp3 import MP3
+
+
+def _find_box(f: BinaryIO, box_type: bytes, end: int) -> Optional[int]:
+    """Seek through sibling boxes until ``box_type``; return its payload end offset."""
+    while f.tell() + 8 <= end:
+        start = f.tell()
+        size, kind = struct.unpack(">I4s", f.read(8))
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+        elif size == 0:
+            size = end - start
+        if size < 8:
+            return None
+        if kind == box_type:
+            return start + size
+        f.seek(start + size)
+    return None
+
+
+def mp4_duration(path: Union[str, os.PathLike]) -> Optional[float]:
+    """Return the movie duration in seconds from the MP4 ``mvhd`` header."""
+    try:
+        with open(path, "rb") as f:
+            moov_end = _find_box(f, b"moov", os.fstat(f.fileno()).st_size)
+            if moov_end is None or _find_box(f, b"mvhd", moov_end) is None:
+                return None
+            version = f.read(4)[0]
+            if version == 1:
+                _, _, timescale, duration = struct.unpack(">QQIQ", f.read(28))
+            else:
+                _, _, timescale, duration = struct.unpack(">IIII", f.read(16))
+    except (OSError, struct.error, IndexError):
+        return None
+    if not timescale:
+        return None
+    return duration / timescale
+
+
+def mp3_duration(path: Union[str, os.PathLike]) -> Optional[float]:
+    """Return the MP3 length in seconds as computed by mutagen."""
+    try:
+        return MP3(path).info.length
+    except (MutagenError, OSError):
+        return None
+
+
+def media_duration(path: Union[str, os.PathLike]) -> Optional[float]:
+    """Duration from headers for .mp4/.mov/.m4a and .mp3 files, else None."""
+    extension = os.path.splitext(str(path))[1].lower()
+    if extension in (".mp4", ".mov", ".m4a"):
+        return mp4_duration(path)
+    if extension == ".mp3":
+        return mp3_duration(path)
+    return None
+
+
+__all__ = ["media_duration", "mp3_duration", "mp4_duration"]
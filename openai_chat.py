@@ -4,7 +4,7 @@ Tiny OpenAI helper.
 
 Import the functions you need:
 
-    from openai_chat import chat, responses, embed
+    from openai_chat import chat, responses, aresponses, embed, aembed, embed_many
     print(chat("Tell me a joke."))
 
 You can also run it directly:
@@ -12,34 +12,87 @@ You can also run it directly:
     python openai_chat.py "Tell me a joke."
     python openai_chat.py --mode responses "Summarise this text."
     python openai_chat.py --mode embeddings "vectorise this"
+    python openai_chat.py --stdin --mode responses < long_prompt.txt
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
+import functools
+import hashlib
 import json
 import os
 import sys
-from typing import Iterable, Sequence
+from typing import Any, Iterable, Sequence
 
+import diskcache
+import orjson
 from dotenv import load_dotenv
-from openai import OpenAI
 
 load_dotenv()
 
 api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise RuntimeError(
-        "OPENAI_API_KEY environment variable not set. "
-        "Export it or add it to your .env file."
-    )
 
-# One global client and a few defaults that other modules can reuse.
-CLIENT = OpenAI(api_key=api_key)
+
+def _require_api_key() -> str:
+    if not api_key:
+        raise RuntimeError(
+            "OPENAI_API_KEY environment variable not set. "
+            "Export it or add it to your .env file."
+        )
+    return api_key
+
+
+# One global client of each kind, created (and the openai SDK imported) on first
+# use. ``CLIENT``/``ASYNC_CLIENT`` still resolve to them via ``__getattr__``.
+@functools.lru_cache(maxsize=1)
+def _sync_client():
+    from openai import OpenAI
+
+    return OpenAI(api_key=_require_api_key())
+
+
+@functools.lru_cache(maxsize=1)
+def _async_client():
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=_require_api_key())
+
+
+def __getattr__(name: str):
+    if name == "CLIENT":
+        return _sync_client()
+    if name == "ASYNC_CLIENT":
+        return _async_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# A few defaults that other modules can reuse.
 DEFAULT_CHAT_MODEL = os.environ.get("OPENAI_CHAT_MODEL", "gpt-5-chat-latest")
 DEFAULT_RESPONSES_MODEL = os.environ.get("OPENAI_RESPONSES_MODEL", "gpt-5-chat-latest")
 DEFAULT_EMBEDDINGS_MODEL = os.environ.get("OPENAI_EMBEDDINGS_MODEL", "gpt-5-chat-latest")
 
+# Opt-in disk cache for chat/responses text, so replaying an identical prompt
+# while iterating doesn't pay for another completion.
+OPENAI_CACHE = os.environ.get("OPENAI_CACHE") == "1"
+OPENAI_CACHE_TTL_SECONDS = int(os.environ.get("OPENAI_CACHE_TTL_SECONDS", "86400"))
+_cache = diskcache.Cache(os.environ.get("OPENAI_CACHE_DIR", ".cache/openai")) if OPENAI_CACHE else None
+
+
+def _cache_key(endpoint: str, model: str, payload: Any) -> str:
+    serialized = json.dumps([endpoint, model, payload], sort_keys=True)
+    return hashlib.blake2b(serialized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _cache_get(key: str) -> str | None:
+    return _cache.get(key) if _cache is not None else None
+
+
+def _cache_set(key: str, text: str) -> None:
+    if _cache is not None:
+        _cache.set(key, text, expire=OPENAI_CACHE_TTL_SECONDS)
+
 
 def chat(prompt: str, *, system: str | None = None, model: str | None = None) -> str:
     """Send a prompt to the Chat Completions endpoint."""
@@ -48,20 +101,25 @@ def chat(prompt: str, *, system: str | None = None, model: str | None = None) ->
         messages.append({"role": "system", "content": system})
     messages.append({"role": "user", "content": prompt})
 
-    result = CLIENT.chat.completions.create(
-        model=model or DEFAULT_CHAT_MODEL,
+    model = model or DEFAULT_CHAT_MODEL
+    key = _cache_key("chat", model, messages)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
+    result = _sync_client().chat.completions.create(
+        model=model,
         messages=messages,
     )
-    return (result.choices[0].message.content or "").strip()
+    text = (result.choices[0].message.content or "").strip()
+    _cache_set(key, text)
+    return text
 
 
-def responses(
+def _responses_payload(
     prompt: str | Iterable[dict[str, str]] | Iterable[str],
-    *,
-    system: str | None = None,
-    model: str | None = None,
-) -> str:
-    """Call the Responses API and return plain text."""
+    system: str | None,
+) -> list[dict[str, str]]:
     # Build message-style payload; prepend system if provided.
     if isinstance(prompt, str):
         base_messages: list[dict[str, str]] = [{"role": "user", "content": prompt}]
@@ -70,15 +128,11 @@ def responses(
         base_messages = list(prompt)  # type: ignore[arg-type]
 
     if system:
-        payload: list[dict[str, str]] = [{"role": "system", "content": system}, *base_messages]
-    else:
-        payload = base_messages
+        return [{"role": "system", "content": system}, *base_messages]
+    return base_messages
 
-    result = CLIENT.responses.create(
-        model=model or DEFAULT_RESPONSES_MODEL,
-        input=payload,
-    )
 
+def _responses_text(result) -> str:
     if hasattr(result, "output_text") and result.output_text:
         return result.output_text.strip()
 
@@ -91,9 +145,71 @@ def responses(
     return "\n".join(chunks).strip()
 
 
+def responses(
+    prompt: str | Iterable[dict[str, str]] | Iterable[str],
+    *,
+    system: str | None = None,
+    model: str | None = None,
+    prompt_cache_key: str | None = None,
+) -> str:
+    """Call the Responses API and return plain text.
+
+    ``prompt_cache_key`` groups requests that share a long static prefix so
+    OpenAI can route them to the same prompt cache.
+    """
+    extra: dict[str, str] = {}
+    if prompt_cache_key:
+        extra["prompt_cache_key"] = prompt_cache_key
+
+    model = model or DEFAULT_RESPONSES_MODEL
+    payload = _responses_payload(prompt, system)
+    key = _cache_key("responses", model, payload)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
+    result = _sync_client().responses.create(
+        model=model,
+        input=payload,
+        **extra,
+    )
+    text = _responses_text(result)
+    _cache_set(key, text)
+    return text
+
+
+async def aresponses(
+    prompt: str | Iterable[dict[str, str]] | Iterable[str],
+    *,
+    system: str | None = None,
+    model: str | None = None,
+    prompt_cache_key: str | None = None,
+) -> str:
+    """Async variant of :func:`responses` that awaits the API on the event loop."""
+    extra: dict[str, str] = {}
+    if prompt_cache_key:
+        extra["prompt_cache_key"] = prompt_cache_key
+
+    model = model or DEFAULT_RESPONSES_MODEL
+    payload = _responses_payload(prompt, system)
+    key = _cache_key("responses", model, payload)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
+    result = await _async_client().responses.create(
+        model=model,
+        input=payload,
+        **extra,
+    )
+    text = _responses_text(result)
+    _cache_set(key, text)
+    return text
+
+
 def embed(text: str | Sequence[str], *, model: str | None = None):
     """Return embeddings for a string or list of strings."""
-    result = CLIENT.embeddings.create(
+    result = _sync_client().embeddings.create(
         model=model or DEFAULT_EMBEDDINGS_MODEL,
         input=text,
     )
@@ -103,6 +219,38 @@ def embed(text: str | Sequence[str], *, model: str | None = None):
     return vectors
 
 
+async def aembed(text: str | Sequence[str], *, model: str | None = None):
+    """Async variant of :func:`embed`."""
+    result = await _async_client().embeddings.create(
+        model=model or DEFAULT_EMBEDDINGS_MODEL,
+        input=text,
+    )
+    vectors = [data.embedding for data in result.data]
+    if isinstance(text, str):
+        return vectors[0]
+    return vectors
+
+
+async def embed_many(
+    texts: Sequence[str],
+    *,
+    model: str | None = None,
+    batch_size: int = 256,
+) -> list[list[float]]:
+    """Embed many strings with one request per ``batch_size`` chunk, sent concurrently.
+
+    Prefer this over calling :func:`aembed` per item: each request carries a
+    whole batch, so N texts cost N / batch_size round trips instead of N.
+    """
+    texts = list(texts)
+    batches = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+    results = await asyncio.gather(*(
+        _async_client().embeddings.create(model=model or DEFAULT_EMBEDDINGS_MODEL, input=batch)
+        for batch in batches
+    ))
+    return [data.embedding for result in results for data in result.data]
+
+
 def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Super simple OpenAI helper CLI.")
     parser.add_argument("prompt", nargs="*", help="Prompt text.")
@@ -114,6 +262,11 @@ def _build_parser() -> argparse.ArgumentParser:
     )
     parser.add_argument("--model", help="Model override.")
     parser.add_argument("--system", help="System prompt (chat/responses only).")
+    parser.add_argument(
+        "--stdin",
+        action="store_true",
+        help="Read the prompt from standard input instead of the command line.",
+    )
     return parser
 
 
@@ -121,13 +274,17 @@ def main(argv: list[str]) -> int:
     parser = _build_parser()
     args = parser.parse_args(argv)
 
-    if not args.prompt:
-        parser.error("You must supply a prompt.")
+    if args.stdin:
+        # Long prompts would not fit in argv; read them in one go.
+        text = sys.stdin.buffer.read().decode("utf-8")
+    elif args.prompt:
+        text = " ".join(args.prompt)
+    else:
+        parser.error("You must supply a prompt (or pass --stdin).")
 
-    text = " ".join(args.prompt)
     if args.mode == "embeddings":
         result = embed(text, model=args.model)
-        print(json.dumps(result))
+        sys.stdout.buffer.write(orjson.dumps(result) + b"\n")
     elif args.mode == "responses":
         result = responses(text, model=args.model, system=args.system)
         print(result)
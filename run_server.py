@@ -28,7 +28,30 @@ def main() -> None:
     parser.add_argument(
         "--reload",
         action="store_true",
-        help="Enable auto-reload for development",
+        help="Enable auto-reload for development (runs a single worker)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=(
+            "Number of worker processes (default: 1). Rate limits (GEMINI_RPM, OPENAI_RPM), "
+            "concurrency caps (SCENE_CONCURRENCY, VIDEO_CONCURRENCY, AD_MAX_CONCURRENT, "
+            "ELEVENLABS_MAX_CONCURRENCY) and in-memory caches are per worker, so divide "
+            "them by the worker count when raising it."
+        ),
+    )
+    parser.add_argument(
+        "--loop",
+        choices=("auto", "asyncio", "uvloop"),
+        default="auto",
+        help="Event loop implementation (default: auto, which picks uvloop when it is installed)",
+    )
+    parser.add_argument(
+        "--http",
+        choices=("auto", "h11", "httptools"),
+        default="auto",
+        help="HTTP protocol implementation (default: auto, which picks httptools when it is installed)",
     )
     args = parser.parse_args()
 
@@ -38,7 +61,19 @@ def main() -> None:
         )
         sys.exit(1)
 
-    uvicorn.run("main:app", host=args.host, port=args.port, reload=args.reload, app_dir=str(ROOT_DIR))
+    # Uvicorn's reloader only supervises one process.
+    workers = 1 if args.reload else max(1, args.workers)
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        reload=args.reload,
+        workers=workers,
+        loop=args.loop,
+        http=args.http,
+        app_dir=str(ROOT_DIR),
+    )
 
 
 if __name__ == "__main__":
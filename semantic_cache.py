@@ -0,0 +1,114 @@
+"""Small embedding-similarity cache for LLM responses.
+
+Entries are kept in memory for lookup and can optionally be persisted to a
+SQLite file so they survive restarts. Callers produce the embeddings; this
+module only stores them and finds the nearest match by cosine similarity.
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+def _normalize(vector: Sequence[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array)) or 1.0
+    return array / norm
+
+
+class SemanticCache:
+    """Cache values by exact key and by nearest embedding.
+
+    ``get_similar`` returns the value whose embedding has the highest cosine
+    similarity to the query, provided it is at least ``threshold``. ``maxsize``
+    bounds the in-memory entries; the oldest are evicted first.
+
+    Embeddings live as rows of one normalized matrix, so a lookup is a single
+    matrix-vector product rather than a Python loop over every entry.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        path: Optional[Union[str, Path]] = None,
+        maxsize: int = 1024,
+    ) -> None:
+        self.threshold = threshold
+        self._maxsize = maxsize
+        # Ring buffer: slot i holds one entry's (key, value) and row i of _matrix.
+        self._slots: List[Optional[Tuple[str, Any]]] = [None] * maxsize
+        self._matrix: Optional[np.ndarray] = None
+        self._has_vector = np.zeros(maxsize, dtype=bool)
+        self._next_slot = 0
+        self._by_key: Dict[str, Any] = {}
+        self._db: Optional[sqlite3.Connection] = None
+
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(key TEXT PRIMARY KEY, vector TEXT, value TEXT NOT NULL)"
+            )
+            rows = self._db.execute(
+                "SELECT key, vector, value FROM entries ORDER BY rowid DESC LIMIT ?",
+                (maxsize,),
+            ).fetchall()
+            for key, vector, value in reversed(rows):
+                self._remember(
+                    key,
+                    np.asarray(json.loads(vector), dtype=np.float32) if vector else None,
+                    json.loads(value),
+                )
+
+    def _remember(self, key: str, vector: Optional[np.ndarray], value: Any) -> None:
+        slot = self._next_slot
+        evicted = self._slots[slot]
+        if evicted is not None and self._by_key.get(evicted[0]) is evicted[1]:
+            del self._by_key[evicted[0]]
+        self._slots[slot] = (key, value)
+        self._has_vector[slot] = False
+        if vector is not None:
+            if self._matrix is None:
+                self._matrix = np.zeros((self._maxsize, vector.shape[0]), dtype=np.float32)
+            # Vectors from a different embedding model can't be compared; keep the exact entry only.
+            if vector.shape[0] == self._matrix.shape[1]:
+                self._matrix[slot] = vector
+                self._has_vector[slot] = True
+        self._next_slot = (slot + 1) % self._maxsize
+        self._by_key[key] = value
+
+    def get_exact(self, key: str) -> Optional[Any]:
+        return self._by_key.get(key)
+
+    def get_similar(self, vector: Sequence[float]) -> Optional[Any]:
+        if self._matrix is None or not self._has_vector.any():
+            return None
+        query = _normalize(vector)
+        if query.shape[0] != self._matrix.shape[1]:
+            return None
+        scores = np.where(self._has_vector, self._matrix @ query, -np.inf)
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            return self._slots[best][1]
+        return None
+
+    def put(self, key: str, value: Any, vector: Optional[Sequence[float]] = None) -> None:
+        normalized = _normalize(vector) if vector is not None else None
+        self._remember(key, normalized, value)
+        if self._db is not None:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (key, vector, value) VALUES (?, ?, ?)",
+                    (
+                        key,
+                        json.dumps(normalized.tolist()) if normalized is not None else None,
+                        json.dumps(value),
+                    ),
+                )
+
+
+__all__ = ["SemanticCache"]
@@ -1,34 +1,153 @@
 """Utilities for generating text-to-speech voiceovers for storyboard scenes."""
 
+import asyncio
+import functools
 import os
 from pathlib import Path
-from typing import Optional, Union
+from typing import List, Optional, Tuple, Union
 
 from dotenv import load_dotenv
 import ffmpeg
-from elevenlabs.client import ElevenLabs
+
+from app.core.http import SHARED_HTTPX
+from media_info import media_duration
 
 load_dotenv()
 
 API_KEY = os.getenv("ELEVENLABS_API_KEY")
-if not API_KEY:
-    raise ValueError("ELEVENLABS_API_KEY environment variable not set")
 
 DEFAULT_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "L1aJrPa7pLJEyYlh3Ilq")
 AUDIO_OUTPUT_PATH = Path("generated_scenes") / "default" / "audio"
+MAX_CONCURRENCY = max(1, int(os.getenv("ELEVENLABS_MAX_CONCURRENCY", "5")))
+WRITE_BATCH_BYTES = 256 * 1024
+# A voiceover ending this close to the scene length is reported as clipped.
+CLIP_TOLERANCE_SECONDS = 0.05
 
-_client = ElevenLabs(api_key=API_KEY)
 
+@functools.lru_cache(maxsize=1)
+def _get_client():
+    # The ElevenLabs SDK is slow to import; only pay for it (and require the key) on first use.
+    if not API_KEY:
+        raise ValueError("ELEVENLABS_API_KEY environment variable not set")
+    from elevenlabs.client import ElevenLabs
 
-def _get_media_duration(path: Union[str, Path]) -> Optional[float]:
-    """Return media duration in seconds using ffmpeg.probe, if available."""
+    return ElevenLabs(api_key=API_KEY, httpx_client=SHARED_HTTPX)
+
+
+@functools.lru_cache(maxsize=512)
+def _probe_duration(path: str, mtime_ns: int, size: int) -> Optional[float]:
+    # mtime_ns and size only key the cache, so a rewritten file is probed again.
+    duration = media_duration(path)
+    if duration:
+        return duration
     try:
-        probe = ffmpeg.probe(str(path))
+        probe = ffmpeg.probe(path)
         return float(probe["format"].get("duration"))
     except Exception:
         return None
 
 
+def _get_media_duration(path: Union[str, Path]) -> Optional[float]:
+    """Return media duration in seconds, read from the file headers when possible, else via ffmpeg.probe."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return _probe_duration(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _synthesize_to_file(
+    text: str,
+    voice_id: str,
+    output_path: Path,
+    max_duration: Optional[float],
+) -> Tuple[Optional[float], bool]:
+    """
+    Stream the TTS audio through ffmpeg into ``output_path``; return (duration, clipped).
+
+    ffmpeg stream-copies the MP3 from stdin and applies ``-t max_duration`` as the
+    bytes arrive, so the clip is trimmed without a second pass over the file.
+    """
+    # convert() streams lazily, so the request and the write both happen here.
+    audio = _get_client().text_to_speech.convert(
+        voice_id=voice_id,
+        text=text,
+        model_id="eleven_multilingual_v2",
+    )
+
+    # ffmpeg writes the file through the page cache on purpose: the duration
+    # probe below and the final stitch read it back shortly, so O_DIRECT or
+    # POSIX_FADV_DONTNEED would only turn those reads into disk I/O.
+    output_args = {"c": "copy"}
+    if max_duration:
+        output_args["t"] = max_duration
+    process = (
+        ffmpeg
+        .input("pipe:", format="mp3")
+        .output(str(output_path), **output_args)
+        .global_args("-loglevel", "error")
+        .overwrite_output()
+        .run_async(pipe_stdin=True, quiet=True)
+    )
+
+    # Coalesce the SDK's small chunks into large writes, keeping them in case
+    # ffmpeg fails and the file has to be written and trimmed the slow way.
+    received: List[bytes] = []
+    pending: List[bytes] = []
+    pending_size = 0
+    try:
+        for chunk in audio:
+            received.append(chunk)
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= WRITE_BATCH_BYTES:
+                process.stdin.write(b"".join(pending))
+                pending, pending_size = [], 0
+        if pending:
+            process.stdin.write(b"".join(pending))
+    except BrokenPipeError:
+        # ffmpeg stops reading once it has max_duration seconds.
+        pass
+    process.communicate()
+
+    if process.returncode:
+        received.extend(audio)
+        output_path.write_bytes(b"".join(received))
+        return _fit_to_duration(output_path, max_duration)
+
+    audio_duration = _get_media_duration(output_path)
+    clipped = bool(max_duration and audio_duration and audio_duration >= max_duration - CLIP_TOLERANCE_SECONDS)
+    return audio_duration, clipped
+
+
+def _trim(source: Path, target: Path, duration: float, **codec) -> None:
+    (
+        ffmpeg
+        .input(str(source))
+        .output(str(target), t=duration, **codec)
+        .overwrite_output()
+        .run(quiet=True)
+    )
+
+
+def _fit_to_duration(output_path: Path, max_duration: Optional[float]) -> Tuple[Optional[float], bool]:
+    """Clip the voiceover to ``max_duration`` if it runs longer; return (duration, clipped)."""
+    audio_duration = _get_media_duration(output_path)
+
+    if max_duration and audio_duration and audio_duration > max_duration:
+        trimmed_path = output_path.with_suffix(".tmp.mp3")
+        try:
+            # MP3 frames cut cleanly, so a stream copy is enough to trim.
+            _trim(output_path, trimmed_path, max_duration, c="copy")
+        except ffmpeg.Error:
+            # Not a stream ffmpeg can copy into .mp3; re-encode instead.
+            _trim(output_path, trimmed_path, max_duration, acodec="mp3")
+        trimmed_path.replace(output_path)
+        return _get_media_duration(output_path) or max_duration, True
+
+    return audio_duration, False
+
+
 async def generate_voiceover(
     text: str,
     scene_index: int,
@@ -42,37 +161,16 @@ async def generate_voiceover(
 
     voice_id = voice_id or DEFAULT_VOICE_ID
 
-    audio = _client.text_to_speech.convert(
-        voice_id=voice_id,
-        text=text,
-        model_id="eleven_multilingual_v2",
-    )
-
     audio_root = Path(output_dir or AUDIO_OUTPUT_PATH)
     audio_root.mkdir(parents=True, exist_ok=True)
 
     output_filename = f"scene{scene_index}_voiceover.mp3"
     output_path = audio_root / output_filename
 
-    with open(output_path, "wb") as f:
-        for chunk in audio:
-            f.write(chunk)
-
-    audio_duration = _get_media_duration(output_path)
-    clipped = False
-
-    if max_duration and audio_duration and audio_duration > max_duration:
-        clipped = True
-        trimmed_path = output_path.with_suffix(".tmp.mp3")
-        (
-            ffmpeg
-            .input(str(output_path))
-            .output(str(trimmed_path), t=max_duration, acodec="mp3")
-            .overwrite_output()
-            .run(quiet=True)
-        )
-        trimmed_path.replace(output_path)
-        audio_duration = _get_media_duration(output_path) or max_duration
+    # The ElevenLabs SDK and ffmpeg both block; keep them off the event loop.
+    audio_duration, clipped = await asyncio.to_thread(
+        _synthesize_to_file, text, voice_id, output_path, max_duration
+    )
 
     return {
         "success": True,
@@ -92,38 +190,45 @@ async def generate_all_voiceovers(
     output_dir: Optional[Union[str, os.PathLike]] = None,
     video_dir: Optional[Union[str, os.PathLike]] = None,
 ) -> list:
-    """Generate voiceovers for all scenes in the storyboard."""
-    results = []
-
-    for i, entry in enumerate(storyboard_data, start=1):
-        voice_text = entry.get("voice_over_text")
-
-        if not voice_text:
-            continue
-
-        max_duration = None
-        if video_dir:
-            scene_video = Path(video_dir) / f"scene{i}.mp4"
-            if scene_video.exists():
-                max_duration = _get_media_duration(scene_video)
-
+    """Generate voiceovers for all scenes in the storyboard, MAX_CONCURRENCY at a time."""
+    scenes = [
+        (i, entry.get("voice_over_text"))
+        for i, entry in enumerate(storyboard_data, start=1)
+        if entry.get("voice_over_text")
+    ]
+
+    async def scene_video_duration(i: int) -> Optional[float]:
+        if not video_dir:
+            return None
+        scene_video = Path(video_dir) / f"scene{i}.mp4"
+        if not scene_video.exists():
+            return None
+        return await asyncio.to_thread(_get_media_duration, scene_video)
+
+    max_durations = await asyncio.gather(*(scene_video_duration(i) for i, _ in scenes))
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+    async def run(i: int, voice_text: str, max_duration: Optional[float]) -> dict:
         try:
-            result = await generate_voiceover(
-                voice_text,
-                i,
-                voice_id,
-                output_dir,
-                max_duration,
-            )
-            results.append(result)
+            async with semaphore:
+                return await generate_voiceover(
+                    voice_text,
+                    i,
+                    voice_id,
+                    output_dir,
+                    max_duration,
+                )
         except Exception as e:
-            results.append({
+            return {
                 "success": False,
                 "scene_index": i,
                 "error": str(e),
-            })
+            }
 
-    return results
+    return list(await asyncio.gather(*(
+        run(i, voice_text, max_duration)
+        for (i, voice_text), max_duration in zip(scenes, max_durations)
+    )))
 
 
 __all__ = ["API_KEY", "DEFAULT_VOICE_ID", "generate_voiceover", "generate_all_voiceovers"]